@@ -2,9 +2,12 @@
 import streamlit as st
 import requests
 import os
+import time
 import pandas as pd
 
 FASTAPI_BASE_URL = "http://127.0.0.1:8000"
+JOB_POLL_INTERVAL = 1.0
+JOB_MAX_WAIT = 600
 st.set_page_config(page_title="Stock Dashboard", layout="wide", initial_sidebar_state="collapsed")
 
 st.markdown("""
@@ -26,7 +29,7 @@ def call_fastapi_tool(endpoint: str, symbol: str):
         return None
     try:
         url = f"{FASTAPI_BASE_URL}/tools/{endpoint}"
-        res = requests.post(url, json={"symbol": symbol}, timeout=300)
+        res = requests.post(url, json={"symbol": symbol}, timeout=60)
         if res.status_code == 200:
             return res.json()
         else:
@@ -37,6 +40,34 @@ def call_fastapi_tool(endpoint: str, symbol: str):
         st.error(f"Connection Error: Could not connect to the API server at {FASTAPI_BASE_URL}. Is it running?")
         return None
 
+def run_fastapi_job(tool: str, symbol: str):
+    """Runs a long tool as a background job on the server and polls until it finishes."""
+    if not symbol:
+        st.warning("Please enter a stock symbol.")
+        return None
+    try:
+        res = requests.post(f"{FASTAPI_BASE_URL}/jobs", json={"tool": tool, "symbol": symbol}, timeout=10)
+        if res.status_code != 202:
+            st.error(f"API Error (Code {res.status_code}): {res.json().get('detail', res.text)}")
+            return None
+        job_id = res.json()["job_id"]
+
+        deadline = time.time() + JOB_MAX_WAIT
+        while time.time() < deadline:
+            job = requests.get(f"{FASTAPI_BASE_URL}/jobs/{job_id}", timeout=10).json()
+            if job["status"] == "succeeded":
+                return job["result"]
+            if job["status"] in ("failed", "cancelled"):
+                st.error(f"Job {job['status']}: {job.get('error') or 'no result'}")
+                return None
+            time.sleep(JOB_POLL_INTERVAL)
+        requests.delete(f"{FASTAPI_BASE_URL}/jobs/{job_id}", timeout=10)
+        st.error("The job took too long and was cancelled.")
+        return None
+    except requests.exceptions.RequestException:
+        st.error(f"Connection Error: Could not connect to the API server at {FASTAPI_BASE_URL}. Is it running?")
+        return None
+
 tab0, tab1, tab2, tab3 = st.tabs(["📄 Stock Profile", "📈 Prediction", "📊 History", "📋 Reports"])
 
 with tab0:
@@ -49,9 +80,10 @@ with tab0:
                 st.caption(f"{result['sector']} | {result['industry']}")
 
                 m_col1, m_col2, m_col3, m_col4 = st.columns(4)
-                m_col1.metric("Market Cap", result['market_cap'])
-                m_col2.metric("P/E Ratio", result['pe_ratio'])
-                m_col3.metric("Beta (Volatility)", result['beta'])
+                market_cap, pe_ratio, beta = result.get('market_cap'), result.get('pe_ratio'), result.get('beta')
+                m_col1.metric("Market Cap", f"${market_cap/1e9:.2f}B" if market_cap is not None else "N/A")
+                m_col2.metric("P/E Ratio", f"{pe_ratio:.2f}" if pe_ratio is not None else "N/A")
+                m_col3.metric("Beta (Volatility)", f"{beta:.2f}" if beta is not None else "N/A")
                 m_col4.metric("Analyst Grade", result.get('latest_recommendation', {}).get('grade', 'N/A'))
                 
                 # Business summary is now always visible
@@ -72,7 +104,7 @@ with tab1:
         st.subheader("5-Day Price Forecast")
         if st.button("Generate 5-Day Forecast"):
             with st.spinner("Running LSTM model... This may take a moment."):
-                result = call_fastapi_tool("predict_price", symbol)
+                result = run_fastapi_job("predict_price", symbol)
                 if result and "predictions" in result:
                     st.metric(label="Current Price (for context)", value=f"${result.get('current_price', 0):.2f}")
                     pred_cols = st.columns(len(result["predictions"]))
@@ -101,11 +133,12 @@ with tab3:
     with col4:
         if st.button("Export Full Report to CSV"):
             with st.spinner("Generating report..."):
-                result = call_fastapi_tool("export_report", symbol)
+                result = run_fastapi_job("export_report", symbol)
                 if result and "report_path" in result:
                     st.success(result['message'])
-                    with open(result['report_path'], "rb") as file:
-                        st.download_button("Download Report", file, os.path.basename(result['report_path']), "text/csv")
+                    report = requests.get(f"{FASTAPI_BASE_URL}/reports/download", params={"symbols": symbol}, timeout=60)
+                    if report.status_code == 200:
+                        st.download_button("Download Report", report.content, f"{symbol}_stock_reports.csv", "text/csv")
 
 st.markdown("---")
 st.caption("Ensure the FastAPI backend is running. The LSTM model is for educational purposes and is not financial advice.")
\ No newline at end of file
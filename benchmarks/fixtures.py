@@ -0,0 +1,116 @@
+# benchmarks/fixtures.py
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from tools.offline_provider import HISTORY_FILE, OFFLINE_FIXTURES_DIR, PRICE_COLUMNS, PROFILES_FILE
+
+# --- CONFIGURATION ---
+DEFAULT_SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "TSLA", "JPM", "XOM"]
+RECORD_PERIOD = "5y"
+SYNTHETIC_DAYS = 1260  # ~5 years of trading days
+SYNTHETIC_END = "2024-06-28"
+SECTORS = ["Technology", "Consumer Cyclical", "Financial Services", "Energy", "Healthcare"]
+
+
+def _write(directory: str, histories: dict, profiles: dict):
+    os.makedirs(directory, exist_ok=True)
+    frames = []
+    for symbol, history in histories.items():
+        frame = history[PRICE_COLUMNS].copy()
+        frame.index = pd.DatetimeIndex(frame.index).tz_localize(None).rename("Date")
+        frames.append(frame.reset_index().assign(symbol=symbol))
+    pd.concat(frames, ignore_index=True).to_parquet(os.path.join(directory, HISTORY_FILE), index=False)
+    with open(os.path.join(directory, PROFILES_FILE), "w") as f:
+        json.dump(profiles, f, indent=2, sort_keys=True, default=str)
+
+
+def record(symbols, directory: str = OFFLINE_FIXTURES_DIR, period: str = RECORD_PERIOD):
+    """Records live daily history, info and analyst recommendations from Yahoo Finance."""
+    import yfinance as yf
+
+    histories, profiles = {}, {}
+    for symbol in symbols:
+        symbol = symbol.upper()
+        history = yf.download(symbol, period=period, interval="1d", progress=False)
+        if isinstance(history.columns, pd.MultiIndex):
+            history.columns = history.columns.droplevel(1)
+        if history.empty:
+            print(f"Skipping {symbol}: no data.")
+            continue
+        if "Adj Close" not in history:
+            history["Adj Close"] = history["Close"]
+        ticker = yf.Ticker(symbol)
+        recs = ticker.recommendations
+        recommendations = []
+        if recs is not None and not recs.empty and isinstance(recs.index, pd.DatetimeIndex):
+            recs = recs.tail(5)
+            recommendations = [{"Date": date.strftime("%Y-%m-%d"), "Firm": row.get("Firm"), "To Grade": row.get("To Grade")}
+                               for date, row in recs.iterrows()]
+        histories[symbol] = history
+        profiles[symbol] = {"info": ticker.info, "recommendations": recommendations}
+        print(f"Recorded {symbol}: {len(history)} bars.")
+    _write(directory, histories, profiles)
+
+
+def synthesize(symbols, directory: str = OFFLINE_FIXTURES_DIR, days: int = SYNTHETIC_DAYS, seed: int = 0):
+    """
+    Writes deterministic fixtures (a geometric random walk per symbol, plus a
+    plausible profile) for machines without network access. The same
+    arguments always produce the same data, so results compare across commits.
+    """
+    histories, profiles = {}, {}
+    index = pd.bdate_range(end=SYNTHETIC_END, periods=days, name="Date")
+    for i, symbol in enumerate(s.upper() for s in symbols):
+        rng = np.random.default_rng([seed, i])
+        close = (50 + 250 * rng.random()) * np.exp(np.cumsum(rng.normal(0.0003, 0.018, days)))
+        open_ = close * (1 + rng.normal(0, 0.006, days))
+        spread = close * rng.uniform(0.003, 0.02, days)
+        histories[symbol] = pd.DataFrame({
+            "Open": open_,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Close": close,
+            "Adj Close": close,
+            "Volume": rng.integers(1_000_000, 50_000_000, days),
+        }, index=index)
+        last_year = close[-252:]
+        profiles[symbol] = {
+            "info": {
+                "symbol": symbol,
+                "shortName": f"{symbol} Corp.",
+                "sector": SECTORS[i % len(SECTORS)],
+                "industry": "Synthetic",
+                "longBusinessSummary": f"Synthetic benchmark fixture for {symbol}.",
+                "marketCap": float(round(close[-1] * rng.integers(1, 20) * 1e9)),
+                "trailingPE": round(float(rng.uniform(8, 60)), 2),
+                "beta": round(float(rng.uniform(0.5, 2.0)), 2),
+                "fiftyTwoWeekHigh": round(float(last_year.max()), 2),
+                "fiftyTwoWeekLow": round(float(last_year.min()), 2),
+                "trailingPegRatio": round(float(rng.uniform(0.5, 3.0)), 2),
+            },
+            "recommendations": [
+                {"Date": "2024-06-03", "Firm": "Fixture Research", "To Grade": ["Buy", "Hold", "Sell"][i % 3]},
+            ],
+        }
+    _write(directory, histories, profiles)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create the market data fixtures used by the benchmarks.")
+    parser.add_argument("symbols", nargs="*", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--dir", default=OFFLINE_FIXTURES_DIR)
+    parser.add_argument("--synthetic", action="store_true", help="Generate deterministic data instead of recording")
+    parser.add_argument("--period", default=RECORD_PERIOD, help="History to record")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        synthesize(args.symbols, args.dir, seed=args.seed)
+    else:
+        record(args.symbols, args.dir, args.period)
+    print(f"Fixtures written to {args.dir}")
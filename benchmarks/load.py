@@ -0,0 +1,281 @@
+# benchmarks/load.py
+"""
+Open-loop HTTP load test for the FastAPI server with an agent-like traffic mix.
+
+    python -m benchmarks.load --spawn-server --workers 2 --rates 5 10 20 40 80
+    python -m benchmarks.load --url http://127.0.0.1:8000 --mix get_current_price=70 predict_price=20 export_report=10
+
+Requests arrive as a Poisson process at each offered rate, whether or not
+earlier ones have finished, and latency is measured from each request's
+scheduled start, so a saturated server shows up as growing latency instead
+of a politely slowed-down client. Symbols follow a Zipf popularity curve.
+With --spawn-server the server runs against the offline market data fixtures.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+from benchmarks.run import DEFAULT_FIXTURES_DIR, REPO_ROOT, prepare_workdir
+
+# --- CONFIGURATION ---
+ROUTES = {
+    "get_current_price": "/tools/get_current_price",
+    "predict_price": "/tools/predict_price",
+    "plot_history": "/tools/plot_history",
+    "log_price": "/tools/log_price",
+    "export_report": "/tools/export_report",
+    "get_stock_summary": "/tools/get_stock_summary",
+}
+DEFAULT_MIX = {"get_current_price": 70, "predict_price": 20, "export_report": 10}
+DEFAULT_RATES = [5, 10, 20, 40, 80]
+DEFAULT_STEP_SECONDS = 30.0
+DEFAULT_ZIPF_EXPONENT = 1.1
+DEFAULT_TIMEOUT_SECONDS = 30.0
+MAX_IN_FLIGHT = 512  # Client threads; arrivals beyond this are counted as dropped
+# A rate is sustainable while the server keeps up with it and stays within the SLO
+MIN_ACHIEVED_FRACTION = 0.95
+MAX_ERROR_RATE = 0.01
+
+_local = threading.local()
+
+
+def _session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    """P(rank k) proportional to 1 / k**exponent over n symbols."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _percentiles(latencies) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = np.array(latencies) * 1000.0
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def _send(base_url: str, tool: str, symbol: str, scheduled: float, timeout: float) -> tuple:
+    try:
+        response = _session().post(base_url + ROUTES[tool], json={"symbol": symbol}, timeout=timeout)
+        outcome = "ok" if response.status_code < 400 else f"http_{response.status_code}"
+    except requests.Timeout:
+        outcome = "timeout"
+    except requests.RequestException:
+        outcome = "connection_error"
+    return tool, outcome, time.perf_counter() - scheduled
+
+
+def run_step(base_url: str, rate: float, duration: float, mix: dict, symbols: list, zipf_exponent: float,
+             timeout: float, rng: np.random.Generator, executor: ThreadPoolExecutor) -> dict:
+    """Offers `rate` requests/s for `duration` seconds and summarizes what came back."""
+    tools = list(mix)
+    tool_p = np.array([mix[t] for t in tools], dtype=float)
+    tool_p /= tool_p.sum()
+    symbol_p = zipf_weights(len(symbols), zipf_exponent)
+
+    futures = []
+    in_flight = threading.Semaphore(MAX_IN_FLIGHT)
+    dropped = 0
+    start = time.perf_counter()
+    next_arrival = start + rng.exponential(1.0 / rate)
+    while next_arrival < start + duration:
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        tool = tools[rng.choice(len(tools), p=tool_p)]
+        symbol = symbols[rng.choice(len(symbols), p=symbol_p)]
+        if in_flight.acquire(blocking=False):
+            future = executor.submit(_send, base_url, tool, symbol, next_arrival, timeout)
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+        else:
+            dropped += 1
+        next_arrival += rng.exponential(1.0 / rate)
+
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start  # Includes draining, so a backlog lowers the achieved rate
+
+    ok = [latency for _, outcome, latency in results if outcome == "ok"]
+    errors = {}
+    for _, outcome, _ in results:
+        if outcome != "ok":
+            errors[outcome] = errors.get(outcome, 0) + 1
+    by_tool = {}
+    for tool in tools:
+        tool_results = [(outcome, latency) for name, outcome, latency in results if name == tool]
+        by_tool[tool] = {
+            "requests": len(tool_results),
+            "errors": sum(1 for outcome, _ in tool_results if outcome != "ok"),
+            **_percentiles([latency for outcome, latency in tool_results if outcome == "ok"]),
+        }
+
+    offered = len(futures) + dropped
+    failed = sum(errors.values()) + dropped
+    return {
+        "offered_rate": rate,
+        "duration_s": round(duration, 2),
+        "offered": offered,
+        # Poisson arrivals only average out to the offered rate over long steps
+        "arrival_rate": round(offered / duration, 2),
+        "completed": len(ok),
+        "achieved_rate": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "error_rate": round(failed / offered, 4) if offered else 0.0,
+        "errors": errors,
+        "dropped": dropped,
+        **_percentiles(ok),
+        "by_tool": by_tool,
+    }
+
+
+def sustainable(step: dict, slo_p95_ms: float) -> bool:
+    return (step["achieved_rate"] >= MIN_ACHIEVED_FRACTION * step["arrival_rate"]
+            and step["error_rate"] <= MAX_ERROR_RATE
+            and step["p95_ms"] is not None and step["p95_ms"] <= slo_p95_ms)
+
+
+def _spawn_server(port: int, workers: int, fixtures: str, latency_ms: float, workdir: str) -> subprocess.Popen:
+    """Starts uvicorn on the offline market data in a scratch directory and waits until it answers."""
+    prepare_workdir(workdir)
+    env = dict(os.environ,
+               OFFLINE_MARKET_DATA="1",
+               OFFLINE_FIXTURES_DIR=fixtures,
+               OFFLINE_LATENCY_MS=str(latency_ms),
+               POLL_INTERVAL_SECONDS="0",
+               PROFILE_REFRESH_INTERVAL_SECONDS="0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", REPO_ROOT, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except requests.RequestException:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Server did not start within 120 seconds")
+
+
+def _parse_mix(items) -> dict:
+    mix = {}
+    for item in items:
+        tool, _, weight = item.partition("=")
+        if tool not in ROUTES or not weight:
+            raise ValueError(f"Bad mix entry '{item}'. Use tool=weight with tool in: {', '.join(ROUTES)}.")
+        mix[tool] = float(weight)
+    return mix
+
+
+def main(argv=None) -> int:
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Open-loop load test of the FastAPI server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to test (ignored with --spawn-server)")
+    parser.add_argument("--spawn-server", action="store_true", help="Start a server on the offline fixtures")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --spawn-server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for --spawn-server")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream latency (--spawn-server)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--mix", nargs="+", default=[f"{t}={w}" for t, w in DEFAULT_MIX.items()],
+                        help="Traffic mix as tool=weight entries")
+    parser.add_argument("--rates", nargs="+", type=float, default=DEFAULT_RATES, help="Offered requests/s per step")
+    parser.add_argument("--step-seconds", type=float, default=DEFAULT_STEP_SECONDS)
+    parser.add_argument("--symbols", nargs="+", help="Symbols, most popular first (default: the fixture symbols)")
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF_EXPONENT, help="Zipf exponent of symbol popularity")
+    parser.add_argument("--slo-p95-ms", type=float, default=1000.0)
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_SECONDS)
+    parser.add_argument("--stop-after-saturation", action="store_true", help="Skip the rates above the first failing one")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    mix = _parse_mix(args.mix)
+    fixtures = os.path.abspath(args.fixtures)
+    if args.spawn_server and not os.path.exists(os.path.join(fixtures, "history.parquet")):
+        from benchmarks.fixtures import DEFAULT_SYMBOLS, synthesize
+        synthesize(DEFAULT_SYMBOLS, fixtures)
+    symbols = args.symbols
+    if not symbols:
+        with open(os.path.join(fixtures, "profiles.json"), "r") as f:
+            symbols = sorted(json.load(f))
+
+    server = None
+    base_url = args.url.rstrip("/")
+    if args.spawn_server:
+        server = _spawn_server(args.port, args.workers, fixtures, args.latency_ms, tempfile.mkdtemp(prefix="tool-load-"))
+        base_url = f"http://127.0.0.1:{args.port}"
+
+    rng = np.random.default_rng(args.seed)
+    steps = []
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as executor:
+            for rate in args.rates:
+                print(f"Offering {rate:g} req/s for {args.step_seconds:g}s...", file=sys.stderr)
+                step = run_step(base_url, rate, args.step_seconds, mix, symbols, args.zipf, args.timeout, rng, executor)
+                step["sustainable"] = sustainable(step, args.slo_p95_ms)
+                steps.append(step)
+                print(f"  achieved {step['achieved_rate']:g} req/s, p50 {step['p50_ms']} ms, p95 {step['p95_ms']} ms, "
+                      f"p99 {step['p99_ms']} ms, errors {step['error_rate']:.2%} ({step['dropped']} dropped)", file=sys.stderr)
+                if args.stop_after_saturation and not step["sustainable"]:
+                    break
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    passing = [step["offered_rate"] for step in steps if step["sustainable"]]
+    failing = [step["offered_rate"] for step in steps if not step["sustainable"]]
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "url": base_url,
+            "spawned_server": args.spawn_server,
+            "workers": args.workers if args.spawn_server else None,
+            "upstream_latency_ms": args.latency_ms if args.spawn_server else None,
+            "mix": mix,
+            "symbols": symbols,
+            "zipf_exponent": args.zipf,
+            "step_seconds": args.step_seconds,
+            "slo_p95_ms": args.slo_p95_ms,
+            "cpu_count": os.cpu_count(),
+        },
+        "steps": steps,
+        "saturation": {
+            # Highest offered rate served within the SLO before the first one that was not
+            "max_sustainable_rate": max((r for r in passing if not failing or r < min(failing)), default=None),
+            "first_saturated_rate": min(failing, default=None),
+        },
+    }
+    body = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(body + "\n")
+    else:
+        print(body)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# benchmarks/run.py
+"""
+Benchmarks every tool function against recorded market data, offline.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline main.json --max-regression 0.2
+
+Each tool runs in its own process (so peak RSS and caches are per tool) in a
+scratch working directory, so the repo's caches, logs and reports are never
+touched. Every tool is timed cold (empty chart, profile and indicator caches
+on each call) and warm (caches filled by the warmup), reported separately.
+Results are JSON; thresholds (benchmarks/thresholds.json) and an optional
+baseline from another commit turn regressions into a non-zero exit.
+"""
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# --- CONFIGURATION ---
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES_DIR = os.path.join(REPO_ROOT, "benchmarks", "fixtures")
+DEFAULT_THRESHOLDS = os.path.join(REPO_ROOT, "benchmarks", "thresholds.json")
+DEFAULT_ITERATIONS = 50
+REPORT_SCHEMA_VERSION = 2  # 2: results split into "cold" and "warm"
+TOOL_NAMES = [
+    "get_current_price",
+    "predict_stock_price",
+    "plot_stock_history",
+    "log_current_price",
+    "export_stock_report",
+    "get_stock_summary",
+]
+MODES = ("cold", "warm")
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _load_tool(name: str):
+    # Imported after the working directory is set up, since tools resolve their paths on import
+    from tools.export_report import export_stock_report
+    from tools.fetch_price import get_current_price
+    from tools.get_stock_summary import get_stock_summary
+    from tools.log_price import log_current_price
+    from tools.plot_history import plot_stock_history
+    from tools.predict_price import predict_stock_price
+    from tools.price_log_writer import get_writer
+
+    def log_and_flush(symbol: str):
+        # log_current_price only queues the row; the write is the cost that matters
+        result = log_current_price(symbol)
+        get_writer().flush()
+        return result
+
+    return {
+        "get_current_price": get_current_price,
+        "predict_stock_price": predict_stock_price,
+        "plot_stock_history": plot_stock_history,
+        "log_current_price": log_and_flush,
+        "export_stock_report": export_stock_report,
+        "get_stock_summary": get_stock_summary,
+    }[name]
+
+
+def _point_caches(directory: str) -> tuple:
+    """Points the chart, profile and indicator caches at a directory; returns the previous locations."""
+    from tools import indicator_store, profile_store, render_cache
+
+    previous = (render_cache.CACHE_DIR, profile_store.PROFILE_DB, indicator_store.INDICATOR_DB)
+    render_cache.CACHE_DIR = os.path.join(directory, "plots")
+    profile_store.PROFILE_DB = os.path.join(directory, "profiles.sqlite3")
+    indicator_store.INDICATOR_DB = os.path.join(directory, "indicators.sqlite3")
+    return previous
+
+
+def _restore_caches(previous: tuple):
+    from tools import indicator_store, profile_store, render_cache
+
+    render_cache.CACHE_DIR, profile_store.PROFILE_DB, indicator_store.INDICATOR_DB = previous
+
+
+def prepare_workdir(workdir: str):
+    """A scratch directory with the repo's trained model, so runs never write into the repo."""
+    os.makedirs(workdir, exist_ok=True)
+    models = os.path.join(workdir, "models")
+    if not os.path.exists(models):
+        try:
+            os.symlink(os.path.join(REPO_ROOT, "models"), models, target_is_directory=True)
+        except OSError:  # No symlink permission (e.g. Windows without developer mode)
+            shutil.copytree(os.path.join(REPO_ROOT, "models"), models)
+
+
+def _summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    iterations = len(latencies)
+    latencies_ms = np.array(latencies) * 1000.0
+    return {
+        "iterations": iterations,
+        "errors": errors,
+        "error_rate": round(errors / iterations, 4) if iterations else 0.0,
+        "mean_ms": round(float(latencies_ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+        "max_ms": round(float(latencies_ms.max()), 3),
+        "throughput_per_s": round(iterations / elapsed, 2) if elapsed else None,
+    }
+
+
+def _timed_calls(fn, symbols, iterations: int, cold_dir: str = None) -> dict:
+    """
+    Times `iterations` calls over the symbols. With cold_dir, every call gets
+    fresh, empty caches in its own subdirectory (set up outside the timing).
+    """
+    latencies = []
+    errors = 0
+    elapsed = 0.0
+    for i in range(iterations):
+        previous = _point_caches(os.path.join(cold_dir, str(i))) if cold_dir else None
+        try:
+            call_start = time.perf_counter()
+            result = fn(symbols[i % len(symbols)])
+            latency = time.perf_counter() - call_start
+        finally:
+            if previous:
+                _restore_caches(previous)
+        latencies.append(latency)
+        elapsed += latency
+        if isinstance(result, dict) and "error" in result:
+            errors += 1
+    if cold_dir:
+        shutil.rmtree(cold_dir, ignore_errors=True)
+    return _summarize(latencies, errors, elapsed)
+
+
+def benchmark_tool(name: str, symbols, iterations: int, warmup: int, modes=MODES) -> dict:
+    """
+    Runs one tool `warmup` times untimed (loading modules and the model and
+    filling the caches), then `iterations` timed calls per mode.
+    """
+    fn = _load_tool(name)
+    for i in range(warmup):
+        fn(symbols[i % len(symbols)])
+
+    result = {"warmup": warmup}
+    for mode in modes:
+        cold_dir = tempfile.mkdtemp(prefix=f"cold-{name}-", dir=os.getcwd()) if mode == "cold" else None
+        result[mode] = _timed_calls(fn, symbols, iterations, cold_dir)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def _run_isolated(name: str, args) -> dict:
+    # A directory per tool, so no tool starts with caches another one warmed
+    workdir = os.path.join(args.workdir, name)
+    output = os.path.join(args.workdir, f"{name}.json")
+    command = [sys.executable, "-m", "benchmarks.run", "--tools", name, "--in-process", "--output", output,
+               "--iterations", str(args.iterations), "--fixtures", args.fixtures, "--workdir", workdir,
+               "--latency-ms", str(args.latency_ms), "--thresholds", "", "--modes", *args.modes]
+    if args.warmup is not None:
+        command += ["--warmup", str(args.warmup)]
+    completed = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0 or not os.path.exists(output):
+        return {"failed": True, "stderr": completed.stderr[-2000:]}
+    with open(output, "r") as f:
+        return json.load(f)["results"][name]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def check_thresholds(results: dict, thresholds: dict) -> list:
+    """Absolute limits per tool and mode, e.g. {"predict_stock_price": {"warm": {"p95_ms": 400}}}."""
+    failures = []
+    for name, modes in thresholds.items():
+        result = results.get(name)
+        if result is None:
+            continue
+        if result.get("failed"):
+            failures.append(f"{name}: benchmark process failed")
+            continue
+        for mode, limits in modes.items():
+            for metric, limit in limits.items():
+                value = result.get(mode, {}).get(metric)
+                if value is not None and value > limit:
+                    failures.append(f"{name} ({mode}): {metric} {value} > limit {limit}")
+    return failures
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Latency percentiles more than max_regression (a fraction) above the baseline report's."""
+    failures = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before or result.get("failed") or before.get("failed"):
+            continue
+        for mode in MODES:
+            old, new = before.get(mode), result.get(mode)
+            if not old or not new:
+                continue
+            for metric in COMPARED_METRICS:
+                if old.get(metric) and new[metric] > old[metric] * (1 + max_regression):
+                    change = (new[metric] / old[metric] - 1) * 100
+                    failures.append(f"{name} ({mode}): {metric} {old[metric]} -> {new[metric]} (+{change:.0f}%)")
+    return failures
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the tool functions against offline market data.")
+    parser.add_argument("--tools", nargs="+", default=TOOL_NAMES, choices=TOOL_NAMES)
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--warmup", type=int, default=None, help="Untimed calls first (default: one per symbol)")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES,
+                        help="cold: empty caches on every call; warm: caches filled by the warmup")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated upstream latency per call")
+    parser.add_argument("--workdir", default=None, help="Scratch directory (default: a new temporary one)")
+    parser.add_argument("--in-process", action="store_true", help="Run every tool in this process")
+    parser.add_argument("--output", help="Write the JSON report here ('-' for stdout)")
+    parser.add_argument("--thresholds", default=DEFAULT_THRESHOLDS, help="JSON of absolute limits ('' to skip)")
+    parser.add_argument("--baseline", help="A previous report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline as a fraction")
+    args = parser.parse_args(argv)
+
+    args.fixtures = os.path.abspath(args.fixtures)
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="tool-bench-"))
+    if not os.path.exists(os.path.join(args.fixtures, "history.parquet")):
+        from benchmarks.fixtures import DEFAULT_SYMBOLS, synthesize
+        print(f"No fixtures in {args.fixtures}; generating deterministic synthetic data.", file=sys.stderr)
+        synthesize(DEFAULT_SYMBOLS, args.fixtures)
+
+    if args.in_process:
+        prepare_workdir(args.workdir)
+        os.chdir(args.workdir)
+        from tools import offline_provider
+        provider = offline_provider.install(args.fixtures, args.latency_ms)
+        symbols = provider.symbols
+        warmup = len(symbols) if args.warmup is None else args.warmup
+        results = {name: benchmark_tool(name, symbols, args.iterations, warmup, args.modes) for name in args.tools}
+    else:
+        results = {}
+        for name in args.tools:
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            results[name] = _run_isolated(name, args)
+
+    report = {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": _git_commit(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "modes": args.modes,
+            "fixtures": args.fixtures,
+            "latency_ms": args.latency_ms,
+            "isolated": not args.in_process,
+        },
+        "results": results,
+    }
+
+    failures = []
+    if args.thresholds:
+        with open(args.thresholds, "r") as f:
+            failures += check_thresholds(results, json.load(f))
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            failures += compare(results, json.load(f), args.max_regression)
+    report["failures"] = failures
+
+    body = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(body)
+    else:
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(body + "\n")
+        print(f"{'tool':<22}{'mode':<6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'errors':>8}{'RSS MB':>9}")
+        for name, result in results.items():
+            if result.get("failed"):
+                print(f"{name:<22}  failed: {result['stderr'].strip().splitlines()[-1:]}")
+                continue
+            for mode in args.modes:
+                timings = result[mode]
+                print(f"{name:<22}{mode:<6}{timings['p50_ms']:>10}{timings['p95_ms']:>10}{timings['p99_ms']:>10}"
+                      f"{timings['throughput_per_s']:>10}{timings['errors']:>8}{str(result['peak_rss_mb']):>9}")
+        for failure in failures:
+            print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
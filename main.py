@@ -1,30 +1,295 @@
 # main.py
-from fastapi import FastAPI, HTTPException, status
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from collections import Counter
+import hmac
+import json
 import logging
+import os
+import time
 
 # Import your tool functions
 from tools.fetch_price import get_current_price
 from tools.predict_price import predict_stock_price
-from tools.plot_history import plot_stock_history
+from tools.plot_history import CHART_MAX_POINTS, CHART_MIN_POINTS, plot_stock_history, plot_price_chart
+from tools import chart_renderer, render_cache
 from tools.log_price import log_current_price
+from tools import price_log_writer, price_store
+from tools.watchlist_poller import POLL_INTERVAL_SECONDS, WatchlistPoller
+from tools.watchlists import get_watchlist, load_watchlists, save_watchlist
 from tools.export_report import export_stock_report
-from tools.get_stock_summary import get_stock_summary
+from tools.bulk_export import run_bulk_export
+from tools import jobs, report_download, report_store, screener
+from tools.get_stock_summary import get_stock_summary, unknown_summary_fields
+from mcp_server import MCP_MAX_BATCH_SYMBOLS, router as mcp_router, tool_definitions
+from tools import agent_manifest, metrics, offline_provider, profiler, tracing
+from tools.profile_ingest import PROFILE_REFRESH_INTERVAL_SECONDS, ProfileRefresher, ingest_profiles
 
 app = FastAPI(
     title="MCP Stock Market Tool Server",
     description="A FastAPI server providing stock tools, including a 5-day price forecast and profile summary.",
-    version="1.1.0"
+    version="1.1.0",
+    # orjson serializes validated responses much faster than the standard json module
+    default_response_class=ORJSONResponse,
 )
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# MCP streamable HTTP transport at /mcp (stdio: python mcp_server.py)
+app.include_router(mcp_router)
+
+# Queue depths are read when /metrics is scraped
+metrics.Gauge("job_queue_depth", "Jobs waiting for a worker.", jobs.queue_depth)
+metrics.Gauge("jobs_tracked", "Tracked jobs by status.",
+              lambda: {(status,): count for status, count in Counter(j["status"] for j in jobs.list_jobs()).items()},
+              ["status"])
+metrics.Gauge("price_log_pending_rows", "Price rows queued for the next log flush.", price_log_writer.pending_rows)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    except Exception:
+        status_code = 500
+        raise
+    finally:
+        # Label by route template (e.g. /jobs/{job_id}) so label values stay bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method)
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=status_code)
+        if status_code >= 500:
+            metrics.HTTP_ERRORS.inc(route=route, method=request.method)
+    return response
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    # Root span of the request (or a child of the caller's W3C traceparent); every
+    # tool, stage and upstream call below it joins this trace
+    with tracing.span(f"{request.method} {request.url.path}", kind=tracing.SPAN_KIND_SERVER,
+                      traceparent=request.headers.get("traceparent"),
+                      **{"http.request.method": request.method, "url.path": request.url.path}) as span:
+        response = await call_next(request)
+        route = getattr(request.scope.get("route"), "path", None)
+        if route:
+            span.name = f"{request.method} {route}"
+            span.set_attribute("http.route", route)
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.record_error(f"HTTP {response.status_code}")
+        response.headers["traceparent"] = span.traceparent
+        response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [trace=%(trace_id)s] %(message)s')
 logger = logging.getLogger(__name__)
 
+# Serve recorded market data instead of calling Yahoo Finance (load tests, demos without network)
+OFFLINE_MARKET_DATA = os.environ.get("OFFLINE_MARKET_DATA", "").lower() in ("1", "true", "yes")
+if OFFLINE_MARKET_DATA:
+    offline_provider.install()
+    logger.warning(f"Offline market data: serving fixtures from {offline_provider.OFFLINE_FIXTURES_DIR}")
+
+poller = WatchlistPoller()
+compactor = price_store.Compactor()
+report_compactor = report_store.Compactor()
+profile_refresher = ProfileRefresher()
+
+@app.on_event("startup")
+def start_workers():
+    # Routes are fixed once the app is built, so the manifest is generated once up front
+    manifest_response()
+    if POLL_INTERVAL_SECONDS > 0:
+        poller.start()
+    compactor.start()
+    if report_store.COMPACT_INTERVAL_SECONDS > 0:
+        report_compactor.start()
+    if PROFILE_REFRESH_INTERVAL_SECONDS > 0:
+        profile_refresher.start()
+
+@app.on_event("shutdown")
+def shutdown_workers():
+    poller.stop()
+    compactor.stop()
+    report_compactor.stop()
+    profile_refresher.stop()
+    jobs.shutdown()
+    chart_renderer.shutdown()
+    price_log_writer.shutdown()
+    tracing.flush()
+
 class StockSymbol(BaseModel):
     symbol: str
 
-@app.post("/tools/get_current_price")
-async def tool_get_current_price(stock_symbol: StockSymbol):
+class SummaryRequest(BaseModel):
+    symbol: str
+    # Summary fields to return, e.g. ["market_cap", "beta"]; all fields when omitted
+    fields: Optional[List[str]] = None
+
+class WatchlistUpdate(BaseModel):
+    symbols: List[str]
+
+class PriceLogQuery(BaseModel):
+    symbols: Optional[List[str]] = None
+    start: Optional[str] = None
+    end: Optional[str] = None
+    limit: Optional[int] = 10000
+
+class BulkExportRequest(BaseModel):
+    symbols: Optional[List[str]] = None
+    watchlist: Optional[str] = None
+    priority: Optional[int] = None
+
+class ProfileIngestRequest(BaseModel):
+    symbols: Optional[List[str]] = None
+    watchlist: Optional[str] = None
+    force: bool = False
+    priority: Optional[int] = None
+
+class ScreenFilter(BaseModel):
+    field: str
+    op: str
+    value: Any
+
+class ScreenRequest(BaseModel):
+    filters: List[ScreenFilter] = []
+    sort_by: Optional[str] = None
+    descending: bool = False
+    limit: int = 50
+    offset: int = 0
+    fields: Optional[List[str]] = None
+
+class IndicatorRefreshRequest(BaseModel):
+    symbols: Optional[List[str]] = None
+    watchlist: Optional[str] = None
+    priority: Optional[int] = None
+
+class JobRequest(BaseModel):
+    tool: str
+    symbol: str
+    priority: Optional[int] = None
+
+# --- Response models ---
+class PriceResponse(BaseModel):
+    symbol: str
+    price: float
+
+class PredictionResponse(BaseModel):
+    symbol: str
+    current_price: float
+    predictions: Dict[str, float]
+    note: str
+
+class PlotResponse(BaseModel):
+    symbol: str
+    message: str
+    plot_path: str
+    etag: str
+
+class ChartResponse(BaseModel):
+    symbols: List[str]
+    period: str
+    interval: str
+    points: Dict[str, int]
+    message: str
+    plot_path: str
+    etag: str
+    missing_symbols: Optional[List[str]] = None
+
+class LogPriceResponse(BaseModel):
+    symbol: str
+    message: str
+    log_path: str
+
+class PriceLogRow(BaseModel):
+    timestamp: str
+    symbol: str
+    price: float
+
+class PriceLogResponse(BaseModel):
+    count: int
+    rows: List[PriceLogRow]
+
+class ReportResponse(BaseModel):
+    symbol: str
+    message: str
+    report_path: str
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+
+class SummaryResponse(BaseModel):
+    # Every field but symbol is optional: a `fields` projection returns only what was asked for
+    symbol: str
+    company_name: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    market_cap: Optional[float] = Field(None, description="Market capitalisation in USD")
+    pe_ratio: Optional[float] = None
+    beta: Optional[float] = None
+    fifty_two_week_high: Optional[float] = Field(None, alias="52_week_high")
+    fifty_two_week_low: Optional[float] = Field(None, alias="52_week_low")
+    business_summary: Optional[str] = None
+    latest_recommendation: Optional[Dict[str, Any]] = None
+
+class ScreenResponse(BaseModel):
+    total: int
+    universe: int
+    offset: int
+    limit: int
+    results: List[Dict[str, Any]]
+
+# Tools that can be submitted to the background job queue via POST /jobs
+JOB_TOOLS = {
+    "get_current_price": get_current_price,
+    "predict_price": predict_stock_price,
+    "plot_history": plot_stock_history,
+    "log_price": log_current_price,
+    "export_report": export_stock_report,
+    "get_stock_summary": get_stock_summary,
+}
+
+class ChartRequest(BaseModel):
+    symbols: List[str]
+    period: str = "1mo"
+    interval: Optional[str] = None
+    max_points: int = Field(CHART_MAX_POINTS, ge=CHART_MIN_POINTS, le=CHART_MAX_POINTS)
+    method: str = "lttb"
+    normalize: bool = False
+
+class ProfileRequest(BaseModel):
+    duration_seconds: float = Field(profiler.PROFILE_DEFAULT_SECONDS, gt=0, le=profiler.PROFILE_MAX_SECONDS)
+    interval_ms: float = Field(profiler.PROFILE_DEFAULT_INTERVAL_MS, ge=profiler.PROFILE_MIN_INTERVAL_MS)
+    # A route or tool, e.g. "/tools/predict_price" or "predict_stock_price"; all traced work when omitted
+    endpoint: Optional[str] = None
+    all_threads: bool = False
+
+def resolve_symbols(symbols: Optional[List[str]], watchlist: Optional[str]) -> List[str]:
+    """Combines explicit symbols with a named watchlist, rejecting an empty result."""
+    resolved = list(symbols or [])
+    if watchlist:
+        resolved.extend(get_watchlist(watchlist))
+    if not resolved:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide symbols or the name of a non-empty watchlist.")
+    return resolved
+
+def cached_png_response(plot_result: dict, request: Request) -> Response:
+    """Serves a rendered chart from the render cache, answering 304 when the client's ETag matches."""
+    etag = f'"{plot_result["etag"]}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    image_bytes = render_cache.read_bytes(plot_result["etag"])
+    if image_bytes is None:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Rendered chart was evicted before it could be served.")
+    return Response(content=image_bytes, media_type="image/png", headers=headers)
+
+@app.post("/tools/get_current_price", response_model=PriceResponse)
+def tool_get_current_price(stock_symbol: StockSymbol):
     try:
         price_data = get_current_price(stock_symbol.symbol)
         if "error" in price_data:
@@ -33,8 +298,8 @@ async def tool_get_current_price(stock_symbol: StockSymbol):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@app.post("/tools/predict_price")
-async def tool_predict_price(stock_symbol: StockSymbol):
+@app.post("/tools/predict_price", response_model=PredictionResponse)
+def tool_predict_price(stock_symbol: StockSymbol):
     try:
         prediction_data = predict_stock_price(stock_symbol.symbol)
         if "error" in prediction_data:
@@ -44,8 +309,8 @@ async def tool_predict_price(stock_symbol: StockSymbol):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Unexpected error predicting price: {str(e)}")
 
-@app.post("/tools/plot_history")
-async def tool_plot_history(stock_symbol: StockSymbol):
+@app.post("/tools/plot_history", response_model=PlotResponse)
+def tool_plot_history(stock_symbol: StockSymbol):
     try:
         plot_result = plot_stock_history(stock_symbol.symbol)
         if "error" in plot_result:
@@ -54,8 +319,40 @@ async def tool_plot_history(stock_symbol: StockSymbol):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@app.post("/tools/log_price")
-async def tool_log_price(stock_symbol: StockSymbol):
+@app.get("/plots/{symbol}")
+def get_plot_image(symbol: str, request: Request):
+    try:
+        plot_result = plot_stock_history(symbol)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    if "error" in plot_result:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=plot_result["error"])
+    return cached_png_response(plot_result, request)
+
+@app.post("/tools/plot_chart", response_model=ChartResponse, response_model_exclude_none=True)
+def tool_plot_chart(chart_request: ChartRequest):
+    try:
+        chart_result = plot_price_chart(**chart_request.dict())
+        if "error" in chart_result:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=chart_result["error"])
+        return chart_result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+@app.get("/charts")
+def get_chart_image(request: Request, symbols: str, period: str = "1mo", interval: Optional[str] = None,
+                    max_points: int = Query(CHART_MAX_POINTS, ge=CHART_MIN_POINTS, le=CHART_MAX_POINTS),
+                    method: str = "lttb", normalize: bool = False):
+    chart_result = plot_price_chart(symbols.split(","), period=period, interval=interval,
+                                    max_points=max_points, method=method, normalize=normalize)
+    if "error" in chart_result:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=chart_result["error"])
+    return cached_png_response(chart_result, request)
+
+@app.post("/tools/log_price", response_model=LogPriceResponse)
+def tool_log_price(stock_symbol: StockSymbol):
     try:
         log_result = log_current_price(stock_symbol.symbol)
         if "error" in log_result:
@@ -64,8 +361,31 @@ async def tool_log_price(stock_symbol: StockSymbol):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@app.post("/tools/export_report")
-async def tool_export_report(stock_symbol: StockSymbol):
+@app.post("/tools/price_log/query", response_model=PriceLogResponse)
+def tool_query_price_log(price_query: PriceLogQuery):
+    try:
+        df = price_store.query(price_query.symbols, price_query.start, price_query.end, price_query.limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to query price log: {str(e)}")
+    df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    return {"count": len(df), "rows": df.to_dict(orient="records")}
+
+@app.get("/watchlists")
+def list_watchlists():
+    return {"watchlists": load_watchlists(), "poller": poller.status()}
+
+@app.get("/watchlists/{name}")
+def read_watchlist(name: str):
+    return {"name": name, "symbols": get_watchlist(name)}
+
+@app.put("/watchlists/{name}")
+def update_watchlist(name: str, update: WatchlistUpdate):
+    return {"name": name, "symbols": save_watchlist(name, update.symbols)}
+
+@app.post("/tools/export_report", response_model=ReportResponse)
+def tool_export_report(stock_symbol: StockSymbol):
     try:
         report_result = export_stock_report(stock_symbol.symbol)
         if "error" in report_result:
@@ -74,16 +394,232 @@ async def tool_export_report(stock_symbol: StockSymbol):
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-@app.post("/tools/get_stock_summary")
-async def tool_get_stock_summary(stock_symbol: StockSymbol):
+@app.post("/tools/export_report/bulk", status_code=status.HTTP_202_ACCEPTED, response_model=JobAccepted)
+def tool_bulk_export_report(bulk_request: BulkExportRequest, request: Request):
+    symbols = resolve_symbols(bulk_request.symbols, bulk_request.watchlist)
+    job = jobs.submit("export_report_bulk", lambda job: run_bulk_export(symbols, job),
+                      params={"symbols": len(symbols), "watchlist": bulk_request.watchlist},
+                      priority=job_priority(bulk_request.priority, jobs.PRIORITY_BULK, request))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.post("/jobs", status_code=status.HTTP_202_ACCEPTED, response_model=JobAccepted)
+def submit_job(job_request: JobRequest, request: Request):
+    tool = JOB_TOOLS.get(job_request.tool)
+    if tool is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown tool '{job_request.tool}'. Use one of: {', '.join(JOB_TOOLS)}.")
+    symbol = job_request.symbol
+    job = jobs.submit(job_request.tool, lambda job: tool(symbol),
+                      params={"symbol": symbol}, priority=job_priority(job_request.priority, jobs.PRIORITY_INTERACTIVE, request))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": jobs.list_jobs(), "queue_depth": jobs.queue_depth()}
+
+def _get_job_or_404(job_id: str):
+    job = jobs.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown job '{job_id}'.")
+    return job
+
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    return _get_job_or_404(job_id).to_dict()
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    _get_job_or_404(job_id)
+    return jobs.cancel_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Streams job status as Server-Sent Events until the job finishes."""
+    job = _get_job_or_404(job_id)
+
+    async def event_stream():
+        version = -1
+        while True:
+            new_version = await job.wait_for_change_async(version, 15.0)
+            if new_version == version:
+                yield ": keep-alive\n\n"
+                continue
+            version = new_version
+            state = job.to_dict()
+            yield f"id: {version}\nevent: {state['status']}\ndata: {json.dumps(state, default=str)}\n\n"
+            if state["status"] in jobs.FINISHED_STATUSES:
+                return
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/profiles/ingest", status_code=status.HTTP_202_ACCEPTED, response_model=JobAccepted)
+def ingest_profile_cache(ingest_request: ProfileIngestRequest, request: Request):
+    symbols = resolve_symbols(ingest_request.symbols, ingest_request.watchlist)
+    job = jobs.submit("profile_ingest", lambda job: ingest_profiles(symbols, job, force=ingest_request.force),
+                      params={"symbols": len(symbols), "watchlist": ingest_request.watchlist,
+                              "force": ingest_request.force},
+                      priority=job_priority(ingest_request.priority, jobs.PRIORITY_BULK, request))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.post("/profiles/refresh", status_code=status.HTTP_202_ACCEPTED, response_model=JobAccepted)
+def refresh_profile_universe():
+    """Runs the scheduled full-universe profile refresh now (or returns the one in flight)."""
+    job = profile_refresher.run_once()
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.post("/tools/screen", response_model=ScreenResponse)
+def tool_screen(screen_request: ScreenRequest):
+    """Screens every cached symbol on fundamentals and the latest technical indicators."""
+    params = screen_request.dict()
+    params["filters"] = [f.dict() for f in screen_request.filters]
+    try:
+        screen_result = screener.screen(**params)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Screen failed: {str(e)}")
+    if "error" in screen_result:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=screen_result["error"])
+    return screen_result
+
+@app.post("/indicators/refresh", status_code=status.HTTP_202_ACCEPTED, response_model=JobAccepted)
+def refresh_indicator_cache(refresh_request: IndicatorRefreshRequest, request: Request):
+    symbols = resolve_symbols(refresh_request.symbols, refresh_request.watchlist)
+    job = jobs.submit("indicator_refresh", lambda job: screener.refresh_indicators(symbols, job),
+                      params={"symbols": len(symbols), "watchlist": refresh_request.watchlist},
+                      priority=job_priority(refresh_request.priority, jobs.PRIORITY_BULK, request))
+    return {"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}"}
+
+@app.get("/reports/download")
+def download_reports(request: Request, symbols: Optional[str] = None, start: Optional[str] = None,
+                     end: Optional[str] = None, gzip: bool = False):
+    """
+    Streams the report dataset as CSV (or gzipped CSV), optionally filtered by
+    symbol and time range. Supports single byte-range requests for resuming.
+    """
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else None
+    try:
+        start_ts, end_ts = report_download.parse_bounds(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid date range: {str(e)}")
+
+    # One listing of the part files serves the ETag, the sizing pass and the body, so they always agree
+    snapshot = report_store.snapshot()
+
+    def make_stream():
+        chunks = report_download.iter_report_csv(symbol_list, start_ts, end_ts, snapshot)
+        return report_download.iter_gzip(chunks) if gzip else chunks
+
+    filename = "full_stock_reports.csv.gz" if gzip else "full_stock_reports.csv"
+    media_type = "application/gzip" if gzip else "text/csv"
+    etag = report_download.download_etag(symbol_list, start_ts, end_ts, gzip, snapshot)
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+    }
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == etag):
+        # Sizing the stream costs one extra pass but keeps memory constant
+        total = report_download.count_bytes(make_stream())
+        try:
+            byte_range = report_download.parse_range(range_header, total)
+        except ValueError:
+            return Response(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers={"Content-Range": f"bytes */{total}"})
+        if byte_range is not None:
+            first, last = byte_range
+            headers["Content-Range"] = f"bytes {first}-{last}/{total}"
+            headers["Content-Length"] = str(last - first + 1)
+            return StreamingResponse(report_download.slice_stream(make_stream(), first, last),
+                                     status_code=status.HTTP_206_PARTIAL_CONTENT, media_type=media_type, headers=headers)
+
+    return StreamingResponse(make_stream(), media_type=media_type, headers=headers)
+
+@app.post("/tools/get_stock_summary", response_model=SummaryResponse, response_model_exclude_unset=True)
+def tool_get_stock_summary(summary_request: SummaryRequest):
+    unknown = unknown_summary_fields(summary_request.fields)
+    if unknown:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown summary fields: {', '.join(unknown)}")
     try:
-        summary_data = get_stock_summary(stock_symbol.symbol)
+        summary_data = get_stock_summary(summary_request.symbol, fields=summary_request.fields)
         if "error" in summary_data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=summary_data["error"])
         return summary_data
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Unexpected error fetching summary: {str(e)}")
 
+DEFAULT_BASE_URL = "http://127.0.0.1:8000"
+# Advertised in the manifest; set it to the public URL when serving behind a proxy
+PUBLIC_BASE_URL = os.environ.get("PUBLIC_BASE_URL", DEFAULT_BASE_URL).rstrip("/")
+_manifest = None
+
+def manifest_response():
+    """Returns (body, etag) for the generated manifest, building it on first use."""
+    global _manifest
+    if _manifest is None:
+        manifest = agent_manifest.build_manifest(app.openapi(), PUBLIC_BASE_URL, tool_definitions(),
+                                                 JOB_TOOLS, MCP_MAX_BATCH_SYMBOLS)
+        _manifest = agent_manifest.encode(manifest)
+    return _manifest
+
+@app.get("/agent.json")
+@app.get("/.well-known/agent.json", include_in_schema=False)
+def get_agent_manifest(request: Request):
+    """Agent/MCP manifest generated from the routes: schemas, batch variants and cost hints."""
+    body, etag = manifest_response()
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of request, stage, cache and queue metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Admin endpoints need this token in X-Admin-Token; they are disabled while it is unset
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+
+def is_admin(request: Request) -> bool:
+    token = request.headers.get("x-admin-token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin(request):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required.")
+
+def job_priority(requested: Optional[int], default: int, request: Request) -> int:
+    """The route's priority; admins may override it, other callers can only lower theirs."""
+    if requested is None:
+        return default
+    if is_admin(request):
+        return requested
+    return max(requested, default)
+
+@app.post("/admin/profile", include_in_schema=False)
+def profile_worker(profile_request: ProfileRequest, request: Request):
+    """
+    Samples this worker's live stacks for a time window and returns them in the
+    collapsed-stack format, ready for flamegraph.pl or speedscope. With several
+    uvicorn workers, each call profiles whichever worker serves it.
+    """
+    require_admin(request)
+    try:
+        result = profiler.sample(profile_request.duration_seconds, profile_request.interval_ms,
+                                 profile_request.endpoint, profile_request.all_threads)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(profiler.collapsed(result["stacks"]), headers={
+        "Content-Disposition": f'attachment; filename="profile-{os.getpid()}-{int(time.time())}.collapsed"',
+        "X-Profile-Samples": str(result["samples"]),
+        "X-Profile-Ticks": str(result["ticks"]),
+        "X-Profile-Duration": str(result["duration"]),
+        "X-Profile-Pid": str(os.getpid()),
+    })
+
 @app.get("/")
 def root():
     return {"message": "MCP Stock Market Server is running"}
\ No newline at end of file
@@ -0,0 +1,422 @@
+# mcp_server.py
+"""
+Model Context Protocol (MCP) server for the stock tools.
+
+Transports:
+    python mcp_server.py     stdio, for agents running on the same machine
+    POST /mcp on main.py     streamable HTTP (JSON responses), mounted by main.py
+
+The protocol is JSON-RPC 2.0, implemented directly so the server runs on the
+FastAPI/Starlette versions pinned in requirements.txt. Requests on one session
+are served concurrently: a slow forecast never blocks a price lookup behind it.
+Every tool also accepts a `symbols` list, which runs as one batched call.
+"""
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+
+import orjson
+
+from fastapi import APIRouter, Request, Response, status
+from starlette.concurrency import run_in_threadpool
+
+from tools.fetch_price import get_current_price
+from tools.predict_price import predict_stock_price, predict_stock_prices
+from tools.plot_history import plot_stock_history
+from tools.log_price import log_current_price
+from tools.export_report import export_stock_report
+from tools.bulk_export import run_bulk_export
+from tools.get_stock_summary import SUMMARY_FIELDS, get_stock_summary
+from tools import metrics, tracing
+
+# --- CONFIGURATION ---
+PROTOCOL_VERSIONS = ["2025-06-18", "2025-03-26", "2024-11-05"]  # Newest first
+SERVER_INFO = {"name": "stock-market-tools", "version": "1.1.0"}
+MCP_MAX_BATCH_SYMBOLS = int(os.environ.get("MCP_MAX_BATCH_SYMBOLS", 50))
+MCP_WORKERS = int(os.environ.get("MCP_WORKERS", 8))  # In-flight tool calls per stdio session
+MCP_FANOUT_WORKERS = int(os.environ.get("MCP_FANOUT_WORKERS", 8))  # Per-symbol calls inside a batch
+# HTTP sessions idle this long are dropped; past the cap the least recently used go first
+MCP_SESSION_IDLE_SECONDS = float(os.environ.get("MCP_SESSION_IDLE_SECONDS", 3600))
+MCP_MAX_SESSIONS = int(os.environ.get("MCP_MAX_SESSIONS", 1000))
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(obj) -> str:
+    """Compact JSON; default=str covers timestamps in tool results."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+# Kept separate from the dispatch pool so a batch waiting on its symbols can never starve it
+_fanout = ThreadPoolExecutor(max_workers=MCP_FANOUT_WORKERS, thread_name_prefix="mcp-fanout")
+
+
+def _fan_out(fn, symbols, **kwargs) -> dict:
+    return dict(zip(symbols, _fanout.map(tracing.in_context(lambda symbol: fn(symbol, **kwargs)), symbols)))
+
+
+def _export_reports(symbols) -> dict:
+    """Runs the bulk export and reshapes its counters into export_stock_report's per-symbol results."""
+    export = run_bulk_export(symbols)
+    if "error" in export:
+        return export
+    errors = export["errors"]
+    return {
+        symbol: {"error": errors[symbol]} if symbol in errors else {
+            "symbol": symbol,
+            "message": f"Report for {symbol} saved successfully.",
+            "report_path": export["report_path"],
+        }
+        for symbol in symbols
+    }
+
+
+# name -> description, single-symbol handler, batch handler (None fans out), extra input properties
+TOOLS = {
+    "get_current_price": {
+        "description": "Fetches the current live price for a stock symbol.",
+        "handler": get_current_price,
+        "batch": None,
+        "properties": {},
+    },
+    "predict_price": {
+        "description": "Predicts the next 5 trading days of prices with the LSTM model. "
+                       "A symbols list runs as one batched model call.",
+        "handler": predict_stock_price,
+        "batch": predict_stock_prices,
+        "properties": {},
+    },
+    "plot_history": {
+        "description": "Renders the 30-day historical price chart and returns its file path.",
+        "handler": plot_stock_history,
+        "batch": None,
+        "properties": {},
+    },
+    "log_price": {
+        "description": "Logs the current price of a stock to the price log.",
+        "handler": log_current_price,
+        "batch": None,
+        "properties": {},
+    },
+    "export_report": {
+        "description": "Saves a report with the current price and 5-day forecast. "
+                       "A symbols list runs the pipelined bulk export and writes every row at once.",
+        "handler": export_stock_report,
+        "batch": _export_reports,
+        "properties": {},
+    },
+    "get_stock_summary": {
+        "description": "Fetches a company profile summary: sector, key metrics and the latest analyst rating.",
+        "handler": get_stock_summary,
+        "batch": None,
+        "properties": {
+            "fields": {
+                "type": "array",
+                "items": {"type": "string", "enum": list(SUMMARY_FIELDS)},
+                "description": "Only return (and only fetch) these fields. Omit for the full summary.",
+            },
+        },
+    },
+}
+
+
+def tool_definitions() -> list:
+    definitions = []
+    for name, tool in TOOLS.items():
+        properties = {
+            "symbol": {"type": "string", "description": "The stock ticker symbol (e.g., AAPL, GOOGL)."},
+            "symbols": {
+                "type": "array",
+                "items": {"type": "string"},
+                "maxItems": MCP_MAX_BATCH_SYMBOLS,
+                "description": "Several ticker symbols, run as one batched call.",
+            },
+            **tool["properties"],
+        }
+        definitions.append({
+            "name": name,
+            "description": tool["description"],
+            "inputSchema": {
+                "type": "object",
+                "properties": properties,
+                "anyOf": [{"required": ["symbol"]}, {"required": ["symbols"]}],
+            },
+        })
+    return definitions
+
+
+class InvalidParams(Exception):
+    pass
+
+
+def call_tool(name: str, arguments: dict, traceparent: str = None) -> dict:
+    """
+    Runs one tool call and returns an MCP CallToolResult. The call is traced
+    as a child of the client's traceparent (or the HTTP request) when given,
+    and the result's _meta carries the trace id.
+    """
+    tool = TOOLS.get(name)
+    if tool is None:
+        raise InvalidParams(f"Unknown tool '{name}'.")
+    metrics.TOOL_CALLS.inc(tool=name)
+    with tracing.span(f"tools/call {name}", kind=tracing.SPAN_KIND_SERVER, traceparent=traceparent, tool=name) as span:
+        try:
+            with metrics.TOOL_LATENCY.time(tool=name):
+                result = _run_tool(tool, arguments)
+        except Exception:
+            metrics.TOOL_ERRORS.inc(tool=name)
+            raise
+        if result["isError"]:
+            metrics.TOOL_ERRORS.inc(tool=name)
+            span.record_error("tool returned an error")
+    result["_meta"] = {"trace_id": span.trace_id}
+    return result
+
+
+def _run_tool(tool: dict, arguments: dict) -> dict:
+    arguments = dict(arguments or {})
+    symbol = arguments.pop("symbol", None)
+    symbols = arguments.pop("symbols", None)
+    unknown = [key for key in arguments if key not in tool["properties"]]
+    if unknown:
+        raise InvalidParams(f"Unknown arguments: {', '.join(unknown)}.")
+    if symbols is None and not isinstance(symbol, str):
+        raise InvalidParams("Provide 'symbol' or 'symbols'.")
+    if symbols is not None and (not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols)):
+        raise InvalidParams("'symbols' must be a list of strings.")
+
+    if symbols is None:
+        result = tool["handler"](symbol, **arguments)
+        is_error = "error" in result
+    else:
+        symbols = list(dict.fromkeys(s.strip().upper() for s in symbols + ([symbol] if symbol else []) if s.strip()))
+        if not symbols or len(symbols) > MCP_MAX_BATCH_SYMBOLS:
+            raise InvalidParams(f"'symbols' must hold between 1 and {MCP_MAX_BATCH_SYMBOLS} symbols.")
+        if tool["batch"] is not None and not arguments:
+            results = tool["batch"](symbols)
+        else:
+            results = _fan_out(tool["handler"], symbols, **arguments)
+        result = {"results": results}
+        is_error = "error" in results or all(isinstance(r, dict) and "error" in r for r in results.values())
+
+    return {
+        "content": [{"type": "text", "text": _dumps(result)}],
+        "structuredContent": result,
+        "isError": is_error,
+    }
+
+
+def _error(request_id, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class MCPSession:
+    """Protocol state for one client connection (a stdio process or an Mcp-Session-Id)."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.protocol_version = PROTOCOL_VERSIONS[0]
+        self.client_info = None
+        self.initialized = False
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def handle(self, message) -> dict:
+        """Handles one JSON-RPC message; returns the response, or None for notifications."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            if isinstance(message, dict) and ("result" in message or "error" in message):
+                return None  # A response to a server request; this server sends none
+            return _error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid JSON-RPC request.")
+
+        method = message["method"]
+        params = message.get("params") or {}
+        request_id = message.get("id")
+        is_notification = "id" not in message
+
+        if is_notification:
+            if method == "notifications/initialized":
+                self.initialized = True
+            elif method == "notifications/cancelled":
+                with self._lock:
+                    self._cancelled.add(params.get("requestId"))
+            return None
+
+        try:
+            if method == "initialize":
+                result = self._initialize(params)
+            elif method == "ping":
+                result = {}
+            elif method == "tools/list":
+                result = {"tools": tool_definitions()}
+            elif method == "tools/call":
+                meta = params.get("_meta") or {}
+                result = call_tool(params.get("name"), params.get("arguments"), meta.get("traceparent"))
+            else:
+                return _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+        except InvalidParams as e:
+            return _error(request_id, INVALID_PARAMS, str(e))
+        except Exception as e:
+            logger.error(f"MCP {method} failed: {e}", exc_info=True)
+            return _error(request_id, INTERNAL_ERROR, str(e))
+
+        with self._lock:
+            if request_id in self._cancelled:
+                self._cancelled.discard(request_id)
+                return None  # The client gave up on this request; send nothing
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def _initialize(self, params: dict) -> dict:
+        requested = params.get("protocolVersion")
+        self.protocol_version = requested if requested in PROTOCOL_VERSIONS else PROTOCOL_VERSIONS[0]
+        self.client_info = params.get("clientInfo")
+        return {
+            "protocolVersion": self.protocol_version,
+            "capabilities": {"tools": {"listChanged": False}},
+            "serverInfo": SERVER_INFO,
+            "instructions": "Stock market tools. Pass 'symbols' instead of 'symbol' to batch several tickers in one call.",
+        }
+
+
+# --- stdio transport ---
+
+def run_stdio(stdin=None, stdout=None):
+    """
+    Serves one session over newline-delimited JSON-RPC. Each request runs on
+    its own worker, and responses are written as they complete, so many tool
+    calls can be in flight at once.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    session = MCPSession()
+    write_lock = threading.Lock()
+
+    def write(response):
+        if response is None:
+            return
+        line = _dumps(response)
+        with write_lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    def dispatch(message):
+        if isinstance(message, list):
+            responses = [r for r in map(session.handle, message) if r is not None]
+            if responses:
+                write(responses)
+        else:
+            write(session.handle(message))
+
+    with ThreadPoolExecutor(max_workers=MCP_WORKERS, thread_name_prefix="mcp-stdio") as executor:
+        for line in stdin:
+            if not line.strip():
+                continue
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError as e:
+                write(_error(None, PARSE_ERROR, f"Parse error: {e}"))
+                continue
+            # Protocol messages are cheap and ordered; tool calls run concurrently
+            if isinstance(message, dict) and message.get("method") != "tools/call":
+                dispatch(message)
+            else:
+                executor.submit(dispatch, message)
+
+
+# --- Streamable HTTP transport ---
+
+router = APIRouter()
+_sessions = OrderedDict()  # id -> (session, last used), least recently used first
+_sessions_lock = threading.Lock()
+
+SESSION_HEADER = "Mcp-Session-Id"
+
+
+def _evict_sessions(now: float):
+    """Drops idle sessions and, past MCP_MAX_SESSIONS, the least recently used. Call with the lock held."""
+    while _sessions:
+        session_id, (_, last_used) = next(iter(_sessions.items()))
+        if now - last_used <= MCP_SESSION_IDLE_SECONDS and len(_sessions) <= MCP_MAX_SESSIONS:
+            break
+        del _sessions[session_id]
+
+
+def _touch_session(session_id: str, session: MCPSession = None):
+    """Marks a session as used (registering `session` under the id if given); None when unknown or expired."""
+    now = time.monotonic()
+    with _sessions_lock:
+        _evict_sessions(now)
+        if session is None:
+            session = _sessions.get(session_id, (None, None))[0]
+            if session is None:
+                return None
+        _sessions[session_id] = (session, now)
+        _sessions.move_to_end(session_id)
+        _evict_sessions(now)
+        return session
+
+
+def _json_response(body, status_code: int = status.HTTP_200_OK, headers: dict = None) -> Response:
+    return Response(_dumps(body), status_code=status_code, headers=headers, media_type="application/json")
+
+
+@router.post("/mcp")
+async def mcp_post(request: Request):
+    try:
+        payload = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        return _json_response(_error(None, PARSE_ERROR, f"Parse error: {e}"), status_code=status.HTTP_400_BAD_REQUEST)
+
+    messages = payload if isinstance(payload, list) else [payload]
+    is_initialize = any(isinstance(m, dict) and m.get("method") == "initialize" for m in messages)
+
+    session_id = request.headers.get(SESSION_HEADER)
+    if is_initialize:
+        session = MCPSession()
+        _touch_session(session.id, session)
+    else:
+        session = _touch_session(session_id) if session_id else None
+        if session is None:
+            status_code = status.HTTP_404_NOT_FOUND if session_id else status.HTTP_400_BAD_REQUEST
+            return _json_response(_error(None, INVALID_REQUEST, "Unknown or missing Mcp-Session-Id."), status_code=status_code)
+
+    # Every message of a batch runs concurrently
+    responses = await asyncio.gather(*(run_in_threadpool(session.handle, m) for m in messages))
+    responses = [r for r in responses if r is not None]
+    headers = {SESSION_HEADER: session.id}
+    if not responses:
+        return Response(status_code=status.HTTP_202_ACCEPTED, headers=headers)
+    body = responses if isinstance(payload, list) else responses[0]
+    return _json_response(body, headers=headers)
+
+
+@router.get("/mcp")
+def mcp_get():
+    # No server-initiated messages, so there is no standalone SSE stream
+    return Response(status_code=status.HTTP_405_METHOD_NOT_ALLOWED, headers={"Allow": "POST, DELETE"})
+
+
+@router.delete("/mcp")
+def mcp_delete(request: Request):
+    with _sessions_lock:
+        _evict_sessions(time.monotonic())
+        session = _sessions.pop(request.headers.get(SESSION_HEADER, ""), None)
+    return Response(status_code=status.HTTP_204_NO_CONTENT if session else status.HTTP_404_NOT_FOUND)
+
+
+if __name__ == "__main__":
+    # stdout carries the protocol, so logs go to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(asctime)s - %(levelname)s - [trace=%(trace_id)s] %(message)s')
+    run_stdio()
@@ -0,0 +1,64 @@
+# tests/test_downsample.py
+import numpy as np
+import pytest
+
+from tools import downsample
+
+
+def series(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return np.arange(n, dtype=np.float64), np.cumsum(rng.normal(0, 1, n))
+
+
+@pytest.mark.parametrize("method", sorted(downsample.METHODS))
+@pytest.mark.parametrize("n, threshold", [(10_000, 1000), (5_000, 3), (1_001, 1000), (999, 500), (100, 7)])
+def test_output_fits_threshold_and_keeps_order(method, n, threshold):
+    x, y = series(n)
+    out_x, out_y = downsample.downsample(x, y, threshold, method)
+    assert len(out_x) == len(out_y) <= threshold
+    assert np.all(np.diff(out_x) > 0)
+    # Every kept point is a real point of the series
+    np.testing.assert_array_equal(out_y, y[out_x.astype(np.int64)])
+
+
+@pytest.mark.parametrize("method", sorted(downsample.METHODS))
+def test_short_series_is_returned_unchanged(method):
+    x, y = series(50)
+    out_x, out_y = downsample.downsample(x, y, 50, method)
+    np.testing.assert_array_equal(out_x, x)
+    np.testing.assert_array_equal(out_y, y)
+
+
+@pytest.mark.parametrize("threshold", [3, 10, 1000])
+def test_lttb_keeps_endpoints(threshold):
+    x, y = series(10_000)
+    out_x, out_y = downsample.lttb(x, y, threshold)
+    assert len(out_x) == threshold
+    assert (out_x[0], out_y[0]) == (x[0], y[0])
+    assert (out_x[-1], out_y[-1]) == (x[-1], y[-1])
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.zeros(10_000)
+    y[4321] = 100.0
+    out_x, out_y = downsample.lttb(x, y, 100)
+    assert 4321.0 in out_x and out_y.max() == 100.0
+
+
+@pytest.mark.parametrize("threshold", [4, 11, 1000])
+def test_minmax_keeps_extrema_and_endpoints(threshold):
+    x, y = series(10_000, seed=3)
+    out_x, out_y = downsample.minmax(x, y, threshold)
+    assert len(out_x) <= threshold
+    assert out_y.min() == y.min() and out_y.max() == y.max()
+    # The first and last buckets each keep their own extremes, so the range is covered end to end
+    edges = np.linspace(0, len(y), threshold // 2 + 1).astype(np.int64)
+    assert out_y[0] in (y[:edges[1]].min(), y[:edges[1]].max())
+    assert out_y[-1] in (y[edges[-2]:].min(), y[edges[-2]:].max())
+
+
+def test_unknown_method():
+    x, y = series(10)
+    with pytest.raises(ValueError):
+        downsample.downsample(x, y, 5, "median")
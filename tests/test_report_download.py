@@ -0,0 +1,78 @@
+# tests/test_report_download.py
+import pytest
+
+from tools import report_download, report_store
+
+DATA = b"0123456789abcdefghij"  # 20 bytes
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-4", (0, 4)),
+    ("bytes=5-", (5, 19)),
+    ("bytes=-5", (15, 19)),
+    ("bytes=-50", (0, 19)),
+    ("bytes=10-100", (10, 19)),
+    ("bytes=19-19", (19, 19)),
+    (" bytes=2-3 ", (2, 3)),
+])
+def test_parse_range(header, expected):
+    assert report_download.parse_range(header, len(DATA)) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=0-1,4-5", "items=0-4", "bytes=a-b"])
+def test_parse_range_ignores_absent_or_unsupported_headers(header):
+    assert report_download.parse_range(header, len(DATA)) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=20-", "bytes=25-30", "bytes=5-2", "bytes=-0"])
+def test_parse_range_rejects_unsatisfiable_ranges(header):
+    with pytest.raises(ValueError):
+        report_download.parse_range(header, len(DATA))
+
+
+def test_parse_range_on_empty_stream():
+    with pytest.raises(ValueError):
+        report_download.parse_range("bytes=0-", 0)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 20, 64])
+@pytest.mark.parametrize("first, last", [(0, 19), (0, 0), (19, 19), (4, 11), (6, 6), (3, 17)])
+def test_slice_stream_matches_slicing(chunk_size, first, last):
+    sliced = b"".join(report_download.slice_stream(chunked(DATA, chunk_size), first, last))
+    assert sliced == DATA[first:last + 1]
+
+
+def test_slice_stream_stops_reading_after_last_byte():
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(DATA, 4):
+            consumed.append(chunk)
+            yield chunk
+
+    assert b"".join(report_download.slice_stream(chunks(), 2, 5)) == DATA[2:6]
+    assert len(consumed) == 2
+
+
+def test_snapshot_keeps_passes_and_etag_consistent(tmp_path, monkeypatch):
+    dataset_dir = tmp_path / "full_stock_reports"
+    monkeypatch.setattr(report_store, "REPORT_DATASET_DIR", str(dataset_dir))
+    monkeypatch.setattr(report_store, "SCHEMA_REGISTRY_FILE", str(dataset_dir / "_schemas.json"))
+    row = {"timestamp": "2024-05-01 10:00:00", "symbol": "AAPL", "current_price": 170.0, "prediction_Day1": 171.0}
+    report_store.append([row])
+
+    snapshot = report_store.snapshot()
+    first_pass = b"".join(report_download.iter_report_csv(snapshot=snapshot))
+    etag = report_download.download_etag(snapshot=snapshot)
+
+    # A report with a longer horizon lands between the two passes
+    report_store.append([dict(row, symbol="MSFT", prediction_Day2=172.0)])
+
+    assert b"".join(report_download.iter_report_csv(snapshot=snapshot)) == first_pass
+    assert report_download.download_etag(snapshot=snapshot) == etag
+    assert report_download.download_etag() != etag
+    assert b"MSFT" in b"".join(report_download.iter_report_csv())
@@ -0,0 +1,47 @@
+# tests/test_report_store.py
+import os
+
+from tools import report_store
+
+
+def test_append_writes_one_part_per_column_set(tmp_path, monkeypatch):
+    dataset_dir = tmp_path / "full_stock_reports"
+    monkeypatch.setattr(report_store, "REPORT_DATASET_DIR", str(dataset_dir))
+    monkeypatch.setattr(report_store, "SCHEMA_REGISTRY_FILE", str(dataset_dir / "_schemas.json"))
+    short = {"timestamp": "2024-05-01 10:00:00", "symbol": "AAPL", "current_price": 170.0, "prediction_Day1": 171.0}
+    long = dict(short, symbol="MSFT", prediction_Day2=172.0)
+
+    report_store.append([short, long, dict(short, symbol="NVDA")])
+
+    parts = sorted(name.split("-")[1] for name in os.listdir(dataset_dir) if name.endswith(".parquet"))
+    assert parts == ["v1", "v2"]
+    assert [entry["columns"][-1] for entry in report_store._load_registry()] == ["prediction_Day1", "prediction_Day2"]
+    reports = report_store.read_reports().set_index("symbol")
+    assert sorted(reports.index) == ["AAPL", "MSFT", "NVDA"]
+    assert reports.loc["MSFT", "prediction_Day2"] == 172.0
+    assert reports["prediction_Day2"].isna().sum() == 2
+
+
+def test_compaction_keeps_snapshots_readable(tmp_path, monkeypatch):
+    dataset_dir = tmp_path / "full_stock_reports"
+    monkeypatch.setattr(report_store, "REPORT_DATASET_DIR", str(dataset_dir))
+    monkeypatch.setattr(report_store, "SCHEMA_REGISTRY_FILE", str(dataset_dir / "_schemas.json"))
+    monkeypatch.setattr(report_store, "COMPACT_MIN_PARTS", 4)
+    row = {"timestamp": "2024-05-01 10:00:00", "symbol": "AAPL", "current_price": 170.0, "prediction_Day1": 171.0}
+    for i in range(4):
+        report_store.append([dict(row, current_price=float(i))])
+
+    files, schema = report_store.snapshot()
+    assert report_store.compact() == 1
+
+    # New readers see only the merged part; the old snapshot still reads the replaced ones
+    assert len(report_store._data_files()) == 1
+    assert len(report_store.read_reports()) == 4
+    assert sum(batch.num_rows for batch in report_store.scan(files=files, schema=schema)) == 4
+
+    # Past the grace period the replaced parts are deleted
+    monkeypatch.setattr(report_store, "RETIRED_GRACE_SECONDS", 0)
+    report_store.compact()
+    assert all(not os.path.exists(path) for path in files)
+    assert len(report_store.read_reports()) == 4
+    assert not os.listdir(dataset_dir / report_store.RETIRED_DIR_NAME)
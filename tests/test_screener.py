@@ -0,0 +1,79 @@
+# tests/test_screener.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import indicator_store, profile_store, screener
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "pe_ratio": [10.0, 25.0, np.nan, 40.0],
+            "RSI": [28.0, 55.0, 71.0, np.nan],
+            "sector": ["Technology", "Energy", "Technology", None],
+        },
+        index=pd.Index(["AAA", "BBB", "CCC", "DDD"], name="symbol"),
+    )
+
+
+def matches(frame, *filters):
+    mask, error = screener.filter_mask(frame, list(filters))
+    assert error is None
+    return list(frame.index[mask])
+
+
+@pytest.mark.parametrize("op, value, expected", [
+    ("<", 25, ["AAA"]),
+    ("<=", 25, ["AAA", "BBB"]),
+    (">", 25, ["DDD"]),
+    (">=", 25, ["BBB", "DDD"]),
+    ("==", 25, ["BBB"]),
+    ("!=", 25, ["AAA", "DDD"]),
+    ("in", [10, 40], ["AAA", "DDD"]),
+    ("between", [10, 25], ["AAA", "BBB"]),
+])
+def test_each_operator(frame, op, value, expected):
+    # CCC has no P/E, so it never matches, not even '!='
+    assert matches(frame, {"field": "pe_ratio", "op": op, "value": value}) == expected
+
+
+def test_filters_are_anded(frame):
+    assert matches(frame, {"field": "RSI", "op": "<", "value": 60},
+                   {"field": "sector", "op": "==", "value": "Technology"}) == ["AAA"]
+
+
+def test_no_filters_match_everything(frame):
+    assert matches(frame) == list(frame.index)
+
+
+@pytest.mark.parametrize("condition, message", [
+    ({"field": "trailingPE", "op": "<", "value": 15}, "Unknown screen field 'trailingPE'"),
+    ({"field": "pe_ratio", "op": "~", "value": 15}, "Unknown operator '~'"),
+    ({"field": "pe_ratio", "op": "between", "value": 15}, "'between' needs"),
+    ({"field": "pe_ratio", "op": "in", "value": 15}, "'in' needs"),
+    ({"field": "sector", "op": "<", "value": 15}, "Cannot compare 'sector'"),
+])
+def test_invalid_filters_return_an_error(frame, condition, message):
+    mask, error = screener.filter_mask(frame, [condition])
+    assert mask is None
+    assert message in error["error"]
+
+
+def test_universe_uses_summary_field_names(monkeypatch):
+    groups = {
+        "fundamentals": {"AAA": {"marketCap": 2e12, "trailingPE": 30.5, "beta": 1.2,
+                                 "fiftyTwoWeekHigh": 200.0, "fiftyTwoWeekLow": 120.0}},
+        "profile": {"AAA": {"symbol": "AAA", "shortName": "AAA Corp.", "sector": "Technology",
+                            "industry": "Software", "longBusinessSummary": "..."}},
+    }
+    monkeypatch.setattr(profile_store, "load_group", groups.get)
+    monkeypatch.setattr(indicator_store, "load_all", lambda: pd.DataFrame(
+        {"indicators_as_of": ["2026-01-02"], "RSI": [44.0]}, index=pd.Index(["AAA"], name="symbol")))
+
+    universe = screener._build_universe()
+    assert {"company_name", "market_cap", "pe_ratio", "peg_ratio", "52_week_high", "52_week_low"} <= set(universe.columns)
+    assert not {"shortName", "marketCap", "trailingPE"} & set(universe.columns)
+    assert universe.loc["AAA", "pe_ratio"] == 30.5
+    assert universe.loc["AAA", "company_name"] == "AAA Corp."
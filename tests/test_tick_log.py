@@ -0,0 +1,71 @@
+# tests/test_tick_log.py
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import tick_log
+
+
+@pytest.fixture
+def tick_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "ticks"
+    monkeypatch.setattr(tick_log, "TICK_DIR", str(directory))
+    monkeypatch.setattr(tick_log, "_symbol_table", tick_log.SymbolTable(str(directory / "symbols.json")))
+    return directory
+
+
+@pytest.fixture
+def new_york(monkeypatch):
+    if not hasattr(time, "tzset"):
+        pytest.skip("Needs time.tzset")
+    monkeypatch.setenv("TZ", "America/New_York")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_round_trip(tick_dir):
+    rows = [("2024-05-01T10:00:00+00:00", "AAPL", 170.25), ("2024-05-01T10:00:01.5+00:00", "msft", 410.0),
+            ("2024-05-01T10:00:02+00:00", "AAPL", 170.5)]
+    assert tick_log.append(rows) == 3
+
+    frame = tick_log.to_frame(tick_log.read_day("2024-05-01"))
+    assert list(frame["symbol"]) == ["AAPL", "MSFT", "AAPL"]
+    assert list(frame["price"]) == [170.25, 410.0, 170.5]
+    assert frame["timestamp"][1] == pd.Timestamp("2024-05-01T10:00:01.5Z")
+
+
+def test_replay_filters_symbols(tick_dir):
+    tick_log.append([("2024-05-01T10:00:00Z", "AAPL", 1.0), ("2024-05-01T10:00:01Z", "MSFT", 2.0)])
+    assert list(tick_log.replay("2024-05-01", ["msft"])["price"]) == [2.0]
+    assert len(tick_log.replay("2024-05-01", ["NVDA"])) == 0
+    assert len(tick_log.replay("2024-05-02")) == 0
+
+
+def test_naive_timestamps_are_local_time(tick_dir, new_york):
+    # 21:30 in New York on May 1 (EDT, UTC-4) is 01:30 UTC on May 2
+    tick_log.append([("2024-05-01T21:30:00", "AAPL", 1.0), ("2024-01-15T12:00:00", "AAPL", 2.0)])
+    assert len(tick_log.read_day("2024-05-01")) == 0
+    may = tick_log.read_day("2024-05-02")
+    assert may["ts_ns"][0] == pd.Timestamp("2024-05-02T01:30:00Z").value
+    # Winter time (EST, UTC-5)
+    assert tick_log.read_day("2024-01-15")["ts_ns"][0] == pd.Timestamp("2024-01-15T17:00:00Z").value
+
+
+def test_partial_record_is_ignored_then_truncated(tick_dir):
+    tick_log.append([("2024-05-01T10:00:00Z", "AAPL", 1.0)])
+    path = tick_log.day_path("2024-05-01")
+    with open(path, "ab") as f:
+        f.write(b"\x00" * (tick_log.TICK_DTYPE.itemsize - 3))  # A crash mid-write
+
+    assert len(tick_log.read_day("2024-05-01")) == 1
+
+    tick_log.append([("2024-05-01T10:00:05Z", "MSFT", 2.0)])
+    assert os.path.getsize(path) == 2 * tick_log.TICK_DTYPE.itemsize
+    ticks = tick_log.read_day("2024-05-01")
+    np.testing.assert_array_equal(ticks["price"], [1.0, 2.0])
+    assert list(tick_log.to_frame(ticks)["symbol"]) == ["AAPL", "MSFT"]
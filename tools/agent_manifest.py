@@ -0,0 +1,116 @@
+# tools/agent_manifest.py
+import hashlib
+import json
+
+# --- CONFIGURATION ---
+MANIFEST_SCHEMA_VERSION = "1.1"
+AGENT_NAME = "StockMarketAnalysisAgent"
+AGENT_DESCRIPTION = ("An agent providing real-time stock data, 5-day ML-based price predictions, "
+                     "historical plotting, screening, and qualitative stock profile summaries.")
+TOOL_PATH_PREFIX = "/tools/"
+
+# Rough expectations for scheduling, not guarantees. "warm" assumes the relevant cache is populated.
+COST_HINTS = {
+    "get_current_price": {"expected_latency_ms": {"warm": 300, "cold": 800}, "upstream_calls": 1},
+    "predict_price": {"expected_latency_ms": {"warm": 700, "cold": 2000}, "upstream_calls": 1, "cpu_bound": True},
+    "plot_history": {"expected_latency_ms": {"warm": 20, "cold": 900}, "upstream_calls": 1, "cached": True},
+    "plot_chart": {"expected_latency_ms": {"warm": 20, "cold": 1200}, "upstream_calls": 1, "cached": True},
+    "log_price": {"expected_latency_ms": {"warm": 300, "cold": 800}, "upstream_calls": 1},
+    "price_log_query": {"expected_latency_ms": {"warm": 30, "cold": 200}, "upstream_calls": 0},
+    "export_report": {"expected_latency_ms": {"warm": 800, "cold": 2200}, "upstream_calls": 1, "cpu_bound": True},
+    "export_report_bulk": {"expected_latency_ms": {"warm": 50, "cold": 50}, "upstream_calls": 0, "async_job": True},
+    "get_stock_summary": {"expected_latency_ms": {"warm": 10, "cold": 1500}, "upstream_calls": 2, "cached": True},
+    "screen": {"expected_latency_ms": {"warm": 15, "cold": 100}, "upstream_calls": 0, "cached": True},
+}
+
+
+def _tool_name(path: str) -> str:
+    return path[len(TOOL_PATH_PREFIX):].replace("/", "_")
+
+
+def _response_schema(operation: dict):
+    for code in ("200", "202"):
+        content = operation.get("responses", {}).get(code, {}).get("content", {})
+        if "application/json" in content:
+            return content["application/json"].get("schema") or None  # {} when the route has no response model
+    return None
+
+
+def _request_schema(operation: dict):
+    content = operation.get("requestBody", {}).get("content", {})
+    return content.get("application/json", {}).get("schema")
+
+
+def _batch_variants(name: str, openapi_paths: dict, mcp_tool_names, job_tools, max_batch: int) -> list:
+    variants = []
+    if name in mcp_tool_names:
+        variants.append({"transport": "mcp", "tool": name, "argument": "symbols", "max_items": max_batch})
+    bulk_path = f"{TOOL_PATH_PREFIX}{name}/bulk"
+    if bulk_path in openapi_paths:
+        variants.append({"transport": "rest", "method": "POST", "path": bulk_path, "async_job": True,
+                         "status_path": "/jobs/{job_id}"})
+    if name in job_tools:
+        variants.append({"transport": "rest", "method": "POST", "path": "/jobs", "async_job": True,
+                         "body": {"tool": name}, "status_path": "/jobs/{job_id}"})
+    return variants
+
+
+def build_manifest(openapi: dict, base_url: str, mcp_tools: list, job_tools, max_batch: int) -> dict:
+    """
+    Builds the agent manifest from the app's OpenAPI document: one entry per
+    /tools/* operation with its request and response schemas, how to batch
+    it, and cost hints. Schema $refs point into the manifest's own components.
+    """
+    base_url = base_url.rstrip("/")
+    paths = openapi.get("paths", {})
+    mcp_tool_names = {tool["name"] for tool in mcp_tools}
+
+    tools = []
+    for path, operations in paths.items():
+        if not path.startswith(TOOL_PATH_PREFIX) or "post" not in operations:
+            continue
+        name = _tool_name(path)
+        operation = operations["post"]
+        tools.append({
+            "name": name,
+            "summary": operation.get("description") or operation.get("summary"),
+            "method": "POST",
+            "path": path,
+            "request_schema": _request_schema(operation),
+            "response_schema": _response_schema(operation),
+            "batch_variants": _batch_variants(name, paths, mcp_tool_names, job_tools, max_batch),
+            "cost_hints": COST_HINTS.get(name, {}),
+        })
+
+    return {
+        "schema_version": MANIFEST_SCHEMA_VERSION,
+        "name": AGENT_NAME,
+        "description": AGENT_DESCRIPTION,
+        "base_url": base_url,
+        "tools": tools,
+        "capabilities": [
+            {
+                "id": "stock_analysis_tools",
+                "name": "Stock Analysis Tools",
+                "type": "rest_api",
+                "openapi_url": f"{base_url}/openapi.json",
+            },
+            {
+                "id": "stock_analysis_mcp",
+                "name": "Stock Analysis MCP Server",
+                "type": "mcp",
+                "transports": [
+                    {"type": "streamable_http", "url": f"{base_url}/mcp"},
+                    {"type": "stdio", "command": "python mcp_server.py"},
+                ],
+                "tools": mcp_tools,
+            },
+        ],
+        "components": openapi.get("components", {}),
+    }
+
+
+def encode(manifest: dict):
+    """Returns the manifest's canonical JSON bytes and a strong ETag for them."""
+    body = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
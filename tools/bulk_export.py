@@ -0,0 +1,174 @@
+# tools/bulk_export.py
+from datetime import datetime
+import logging
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from tools import metrics, predict_price, tracing
+from tools.export_report import build_report_row, write_report_rows
+from tools.market_snapshot import MarketSnapshot
+
+# --- CONFIGURATION ---
+FETCH_CHUNK_SIZE = int(os.environ.get("BULK_EXPORT_FETCH_CHUNK_SIZE", 50))
+# Download threads per chunk; yfinance's bulk download is not safe to run concurrently
+# with itself, so chunks are fetched one at a time and parallelised inside the call
+FETCH_CONCURRENCY = int(os.environ.get("BULK_EXPORT_FETCH_CONCURRENCY", 8))
+INFERENCE_BATCH_SIZE = int(os.environ.get("BULK_EXPORT_INFERENCE_BATCH_SIZE", 256))
+STAGE_QUEUE_SIZE = 4  # Chunks buffered between stages before upstream stages wait
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+def _split_download(data: pd.DataFrame, chunk):
+    """Splits a group_by='ticker' download into one MarketSnapshot per symbol."""
+    if not isinstance(data.columns, pd.MultiIndex):
+        return [MarketSnapshot(chunk[0], data)]
+    present = set(data.columns.get_level_values(0))
+    return [MarketSnapshot(symbol, data[symbol].dropna(how="all")) for symbol in chunk if symbol in present]
+
+
+def _fetch_stage(symbols, period: str, out_q: queue.Queue, errors: dict, stop: threading.Event):
+    try:
+        for start in range(0, len(symbols), FETCH_CHUNK_SIZE):
+            if stop.is_set():
+                break
+            chunk = symbols[start:start + FETCH_CHUNK_SIZE]
+            try:
+                with metrics.stage("upstream_fetch", call="download", symbols=len(chunk), period=period):
+                    data = yf.download(chunk, period=period, interval="1d", group_by="ticker",
+                                       threads=FETCH_CONCURRENCY, progress=False)
+                snapshots = [] if data.empty else _split_download(data, chunk)
+            except Exception as e:
+                logger.error(f"Bulk export download failed for {len(chunk)} symbols: {e}")
+                snapshots = []
+            fetched = {s.symbol for s in snapshots}
+            for symbol in chunk:
+                if symbol not in fetched:
+                    errors[symbol] = f"No data found for '{symbol}'."
+            out_q.put(snapshots)
+    finally:
+        out_q.put(_DONE)
+
+
+def _feature_stage(in_q: queue.Queue, out_q: queue.Queue, errors: dict):
+    try:
+        while True:
+            snapshots = in_q.get()
+            if snapshots is _DONE:
+                break
+            prepared = []
+            for snapshot in snapshots:
+                try:
+                    X, error = predict_price.prepare_model_input(snapshot.symbol, snapshot)
+                except Exception as e:
+                    X, error = None, {"error": str(e)}
+                if error:
+                    errors[snapshot.symbol] = error["error"]
+                else:
+                    prepared.append((snapshot.symbol, snapshot.current_price, X))
+            out_q.put(prepared)
+    finally:
+        out_q.put(_DONE)
+
+
+def run_bulk_export(symbols, job=None) -> dict:
+    """
+    Exports reports for many symbols as a pipeline:
+
+        fetch (bulk downloads) -> features (indicators + scaling)
+            -> batched inference -> one write of every row
+
+    Stages run concurrently and hand work over through bounded queues, so
+    downloads overlap with feature engineering and model calls, and memory
+    stays bounded however many symbols are requested.
+
+    Args:
+        symbols (list): Ticker symbols to export.
+        job (Job): Optional job to report progress on.
+
+    Returns:
+        dict: Counts, the report path and per-symbol errors, or an error message.
+    """
+    if predict_price.model is None:
+        return {"error": "Model not loaded. Please train the model first by running train_model.py"}
+
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    if not symbols:
+        return {"error": "No symbols to export."}
+
+    total = len(symbols)
+    if job is not None:
+        job.update_progress(done=0, total=total, stage="fetch")
+
+    errors = {}
+    stop = threading.Event()
+    fetch_q = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    feature_q = queue.Queue(maxsize=STAGE_QUEUE_SIZE)
+    period = f"{predict_price.LOOKBACK + 60}d"
+    stages = [
+        threading.Thread(target=tracing.in_context(_fetch_stage), args=(symbols, period, fetch_q, errors, stop), name="bulk-export-fetch", daemon=True),
+        threading.Thread(target=tracing.in_context(_feature_stage), args=(fetch_q, feature_q, errors), name="bulk-export-features", daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    # --- Inference stage: batch windows from many symbols into one model call ---
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rows = []
+    pending = []
+
+    def run_batch():
+        X_batch = np.concatenate([X for _, _, X in pending])
+        prices = predict_price.predict_batch(X_batch)
+        for (symbol, current_price, _), forecast in zip(pending, prices):
+            prediction = predict_price.format_prediction(symbol, current_price, forecast)
+            rows.append(build_report_row(symbol, prediction["current_price"], prediction["predictions"], timestamp))
+        pending.clear()
+
+    try:
+        while True:
+            prepared = feature_q.get()
+            if prepared is _DONE:
+                break
+            if job is not None:
+                job.check_cancelled()
+            pending.extend(prepared)
+            if len(pending) >= INFERENCE_BATCH_SIZE:
+                run_batch()
+            if job is not None:
+                job.update_progress(done=len(rows) + len(errors), stage="inference")
+        if pending:
+            run_batch()
+    except BaseException:
+        # Unblock the upstream stages so their threads can exit
+        stop.set()
+        while feature_q.get() is not _DONE:
+            pass
+        raise
+
+    for stage in stages:
+        stage.join()
+
+    # --- Write stage: every row in one write ---
+    report_path = None
+    if rows:
+        if job is not None:
+            job.update_progress(done=len(rows) + len(errors), stage="write")
+        report_path = write_report_rows(rows)
+    if job is not None:
+        job.update_progress(done=total, stage="done")
+
+    return {
+        "requested": total,
+        "exported": len(rows),
+        "failed": len(errors),
+        "report_path": report_path,
+        "errors": errors,
+    }
@@ -0,0 +1,124 @@
+# tools/chart_renderer.py
+import matplotlib
+matplotlib.use("Agg")  # Pin a non-interactive backend; the server never opens windows
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor
+import io
+import logging
+import os
+import threading
+
+from tools import metrics
+
+# --- CONFIGURATION ---
+# 0 renders in the calling thread instead of a process pool
+RENDER_WORKERS = int(os.environ.get("CHART_RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+# Recycle worker processes periodically so long-running servers keep bounded memory
+RENDER_TASKS_PER_WORKER = int(os.environ.get("CHART_RENDER_TASKS_PER_WORKER", 200))
+RENDER_TIMEOUT_SECONDS = 60
+
+# Figure templates: everything about a chart's look that does not depend on the data
+TEMPLATES = {
+    "history": {
+        "figsize": (12, 6),
+        "title_fontsize": 16,
+        "label_fontsize": 12,
+        "legend_fontsize": 10,
+        "linewidth": 1.5,
+        "grid_linestyle": "--",
+        "grid_alpha": 0.7,
+        "xtick_rotation": 45,
+    },
+}
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+# Each thread (or worker process) keeps its own figures, so no figure is ever shared
+_local = threading.local()
+
+
+def _get_template_figure(template_name: str):
+    """Returns a cleared, reusable Figure for this thread and template."""
+    figures = getattr(_local, "figures", None)
+    if figures is None:
+        figures = _local.figures = {}
+
+    fig = figures.get(template_name)
+    if fig is None:
+        template = TEMPLATES[template_name]
+        fig = Figure(figsize=template["figsize"])
+        FigureCanvasAgg(fig)
+        figures[template_name] = fig
+    else:
+        fig.clear()
+    return fig
+
+
+def render_line_chart(template_name: str, title: str, series, xlabel: str = "Date",
+                      ylabel: str = "Price", dpi: int = 100) -> bytes:
+    """
+    Renders one or more line series to PNG bytes using the object-oriented
+    Figure/Agg API. Nothing touches pyplot's global state.
+
+    Args:
+        template_name (str): Key into TEMPLATES.
+        title (str): Chart title.
+        series (list): Dicts with "x", "y" and optional "label" and "color".
+
+    Returns:
+        bytes: The encoded PNG image.
+    """
+    template = TEMPLATES[template_name]
+    fig = _get_template_figure(template_name)
+    ax = fig.add_subplot(1, 1, 1)
+
+    for line in series:
+        ax.plot(line["x"], line["y"], label=line.get("label"), color=line.get("color"),
+                linewidth=template["linewidth"])
+
+    ax.set_title(title, fontsize=template["title_fontsize"])
+    ax.set_xlabel(xlabel, fontsize=template["label_fontsize"])
+    ax.set_ylabel(ylabel, fontsize=template["label_fontsize"])
+    ax.grid(True, linestyle=template["grid_linestyle"], alpha=template["grid_alpha"])
+    ax.legend(fontsize=template["legend_fontsize"])
+    for tick in ax.get_xticklabels():
+        tick.set_rotation(template["xtick_rotation"])
+        tick.set_horizontalalignment("right")
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    fig.clear()  # Drop the artists now rather than holding them until the next render
+    return buffer.getvalue()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=RENDER_WORKERS,
+                                        max_tasks_per_child=RENDER_TASKS_PER_WORKER)
+            logger.info(f"Started chart rendering pool with {RENDER_WORKERS} workers.")
+        return _pool
+
+
+def render(template_name: str, title: str, series, **kwargs) -> bytes:
+    """Renders a chart on the process pool (or inline if the pool is disabled)."""
+    with metrics.stage("render"):
+        if RENDER_WORKERS <= 0:
+            return render_line_chart(template_name, title, series, **kwargs)
+        future = _get_pool().submit(render_line_chart, template_name, title, series, **kwargs)
+        return future.result(timeout=RENDER_TIMEOUT_SECONDS)
+
+
+def shutdown():
+    """Stops the rendering pool. Called when the server shuts down."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
@@ -0,0 +1,92 @@
+# tools/downsample.py
+import numpy as np
+
+
+def lttb(x, y, threshold: int):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, for every bucket in between, the point
+    that forms the largest triangle with the previously kept point and the
+    average of the next bucket. Preserves the visual shape of a line chart.
+
+    Args:
+        x (array-like): Monotonic numeric x values (e.g., epoch nanoseconds).
+        y (array-like): Values aligned with x.
+        threshold (int): Maximum number of points to return.
+
+    Returns:
+        tuple: (x, y) numpy arrays with at most `threshold` points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        if next_end <= next_start:
+            next_end = next_start + 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        if end <= start:
+            end = start + 1
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((x[a] - avg_x) * (bucket_y - y[a]) - (x[a] - bucket_x) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        keep[i + 1] = a
+
+    return x[keep], y[keep]
+
+
+def minmax(x, y, threshold: int):
+    """
+    Min/max downsampling: keeps the lowest and highest point of each bucket.
+
+    Cheaper than LTTB and guarantees that every extreme survives, which suits
+    volatile intraday series.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    n_buckets = threshold // 2
+    if threshold >= n or n_buckets < 1:
+        return x, y
+
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    lo = np.minimum.reduceat(y, starts)
+    hi = np.maximum.reduceat(y, starts)
+
+    keep = []
+    for start, end, lo_val, hi_val in zip(starts, edges[1:], lo, hi):
+        bucket = y[start:end]
+        i_lo = start + int(np.argmax(bucket == lo_val))
+        i_hi = start + int(np.argmax(bucket == hi_val))
+        keep.extend(sorted({i_lo, i_hi}))
+
+    keep = np.asarray(keep, dtype=np.int64)
+    return x[keep], y[keep]
+
+
+METHODS = {
+    "lttb": lttb,
+    "minmax": minmax,
+}
+
+
+def downsample(x, y, threshold: int, method: str = "lttb"):
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of: {', '.join(METHODS)}.")
+    return METHODS[method](x, y, threshold)
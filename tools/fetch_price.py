@@ -1,19 +1,34 @@
 import yfinance as yf
 
-def get_current_price(symbol: str):
+from tools import metrics
+from tools.tracing import traced
+
+@traced()
+def get_current_price(symbol: str, snapshot=None):
     """
     Fetches the current stock price for a given symbol from Yahoo Finance.
 
     Args:
         symbol (str): The stock ticker symbol (e.g., "AAPL", "GOOGL").
+        snapshot (MarketSnapshot): Optional already-fetched history to read the
+            latest close from instead of making another request.
 
     Returns:
         dict: A dictionary containing the symbol and its current price,
               or an error message if data cannot be retrieved.
     """
     try:
+        if snapshot is not None:
+            if snapshot.empty:
+                return {"error": f"No data found for '{symbol}'. Please check the symbol."}
+            return {
+                "symbol": symbol.upper(),
+                "price": snapshot.current_price
+            }
+
         stock = yf.Ticker(symbol)
-        data = stock.history(period="1d")
+        with metrics.stage("upstream_fetch", call="Ticker.history", symbol=symbol.upper(), period="1d"):
+            data = stock.history(period="1d")
 
         if data.empty:
             return {"error": f"No data found for '{symbol}'. Please check the symbol."}
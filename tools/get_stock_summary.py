@@ -1,54 +1,138 @@
 # tools/get_stock_summary.py
+import time
+
 import yfinance as yf
 import pandas as pd
 
-def get_stock_summary(symbol: str):
+from tools import jobs, metrics, profile_store
+from tools.tracing import traced
+
+def _direct(fn):
+    with metrics.stage("upstream_fetch"):
+        return fn()
+
+def _latest_recommendation(ticker, upstream=_direct) -> dict:
+    # --- Analyst Recommendation ---
+    # Upstream failures propagate so the caller can keep serving the cached value
+    recs = upstream(lambda: ticker.recommendations)
+    try:
+        if recs is not None and not recs.empty:
+            latest_rec = recs.iloc[-1]
+            return {
+                "firm": latest_rec.get('Firm'),
+                "grade": latest_rec.get('To Grade'),
+                "date": latest_rec.name.strftime('%Y-%m-%d')
+            }
+        return {"grade": "N/A"}
+    except Exception:
+        return {"grade": "N/A"}
+
+@traced(args=("symbol", "force"))
+def refresh_profile(symbol: str, groups=None, upstream=_direct, force: bool = False):
+    """
+    Makes sure the cached profile for a symbol is fresh, fetching only the
+    field groups whose TTL has expired (or every group when force is set).
+    Each upstream call goes through upstream(fn), which bulk ingestion uses
+    for rate limiting and retries.
+
+    Returns:
+        tuple: ({group: (data, fetched_at)}, error message or None). On a
+               failed refresh (invalid data, a network error, a 429) any
+               stale cached groups are still returned, along with any groups
+               that were fetched before the failure.
+    """
+    cached = profile_store.get(symbol)
+    groups = list(profile_store.FIELD_GROUPS) if groups is None else groups
+    stale = groups if force else profile_store.stale_groups(cached, groups)
+    metrics.cache_lookup("profile", not stale)
+    if not stale:
+        return cached, None
+
+    ticker = yf.Ticker(symbol)
+    fresh = {}
+    error = None
+    try:
+        if any(group in profile_store.INFO_GROUPS for group in stale):
+            info = upstream(lambda: ticker.info)
+
+            # A simple check for valid data
+            if not info or info.get('trailingPegRatio') is None:
+                return cached, f"Could not retrieve valid summary data for '{symbol}'. It may be an invalid ticker."
+            fresh.update(profile_store.split_info(info))
+
+        if "recommendation" in stale:
+            fresh["recommendation"] = {"latest_recommendation": _latest_recommendation(ticker, upstream)}
+    except jobs.JobCancelled:
+        raise
+    except Exception as e:
+        error = f"Could not refresh the profile for '{symbol}': {str(e)}"
+
+    if fresh:
+        fetched_at = time.time()
+        profile_store.put(symbol, fresh, fetched_at)
+        cached.update({group: (data, fetched_at) for group, data in fresh.items()})
+    return cached, error
+
+def _number(value, digits: int = 2):
+    """Keeps metrics numeric for clients to format; None when Yahoo has no value."""
+    if isinstance(value, (int, float)) and value == value:  # value == value filters out NaN
+        return round(float(value), digits)
+    return None
+
+# Each summary field: (profile field group it is built from, extractor over the merged info dict).
+# Metrics are returned as numbers (market_cap in USD), not pre-formatted strings.
+SUMMARY_FIELDS = {
+    "company_name": ("profile", lambda info: info.get('shortName')),
+    "sector": ("profile", lambda info: info.get('sector') or 'N/A'),
+    "industry": ("profile", lambda info: info.get('industry') or 'N/A'),
+    "market_cap": ("fundamentals", lambda info: _number(info.get('marketCap'), 0)),
+    "pe_ratio": ("fundamentals", lambda info: _number(info.get('trailingPE'))),
+    "beta": ("fundamentals", lambda info: _number(info.get('beta'))), # Beta measures volatility
+    "52_week_high": ("fundamentals", lambda info: _number(info.get('fiftyTwoWeekHigh'))),
+    "52_week_low": ("fundamentals", lambda info: _number(info.get('fiftyTwoWeekLow'))),
+    "business_summary": ("profile", lambda info: info.get('longBusinessSummary') or 'No summary available.'),
+    "latest_recommendation": ("recommendation", lambda info: info.get('latest_recommendation') or {"grade": "N/A"}),
+}
+
+def unknown_summary_fields(fields) -> list:
+    return [field for field in fields or [] if field != "symbol" and field not in SUMMARY_FIELDS]
+
+@traced()
+def get_stock_summary(symbol: str, fields=None):
     """
     Fetches a summary of a stock's profile, including business summary,
     key metrics, and analyst ratings.
+
+    Profile data is served from the persistent profile store and only the
+    field groups past their TTL are re-fetched from Yahoo Finance. When
+    `fields` is given, only those summary fields (plus the symbol) are
+    returned, and field groups nobody asked for are never fetched; e.g.
+    ["market_cap", "beta"] skips the recommendations call entirely, and
+    ["symbol"] makes no upstream call at all.
     """
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-
-        # A simple check for valid data
-        if not info or info.get('trailingPegRatio') is None:
-            return {"error": f"Could not retrieve valid summary data for '{symbol}'. It may be an invalid ticker."}
-
-        # --- Key Metrics ---
-        market_cap = info.get('marketCap', 'N/A')
-        if isinstance(market_cap, (int, float)):
-            market_cap = f"${market_cap/1e9:.2f}B"
-
-        summary_data = {
-            "symbol": info.get('symbol'),
-            "company_name": info.get('shortName'),
-            "sector": info.get('sector', 'N/A'),
-            "industry": info.get('industry', 'N/A'),
-            "market_cap": market_cap,
-            "pe_ratio": f"{info.get('trailingPE', 0):.2f}",
-            "beta": f"{info.get('beta', 0):.2f}", # Beta measures volatility
-            "52_week_high": f"${info.get('fiftyTwoWeekHigh', 0):.2f}",
-            "52_week_low": f"${info.get('fiftyTwoWeekLow', 0):.2f}",
-            "business_summary": info.get('longBusinessSummary', 'No summary available.')
-        }
-
-        # --- Analyst Recommendation ---
-        try:
-            recs = ticker.recommendations
-            if recs is not None and not recs.empty:
-                latest_rec = recs.iloc[-1]
-                summary_data['latest_recommendation'] = {
-                    "firm": latest_rec.get('Firm'),
-                    "grade": latest_rec.get('To Grade'),
-                    "date": latest_rec.name.strftime('%Y-%m-%d')
-                }
-            else:
-                summary_data['latest_recommendation'] = {"grade": "N/A"}
-        except Exception:
-            summary_data['latest_recommendation'] = {"grade": "N/A"}
+        unknown = unknown_summary_fields(fields)
+        if unknown:
+            return {"error": f"Unknown summary fields: {', '.join(unknown)}. Valid fields: {', '.join(SUMMARY_FIELDS)}."}
+        selected = list(SUMMARY_FIELDS) if fields is None else [f for f in SUMMARY_FIELDS if f in fields]
+        groups = list(dict.fromkeys(SUMMARY_FIELDS[field][0] for field in selected))
+        if not groups:  # e.g. fields=["symbol"]: nothing to fetch
+            return {"symbol": symbol.upper()}
+
+        cached, error = refresh_profile(symbol, groups)
+        if error and not all(group in cached for group in groups if group in profile_store.INFO_GROUPS):
+            return {"error": error}
+
+        info = {}
+        for group in groups:
+            if group in cached:
+                info.update(cached[group][0])
+
+        summary_data = {"symbol": info.get('symbol') or symbol.upper()}
+        for field in selected:
+            summary_data[field] = SUMMARY_FIELDS[field][1](info)
 
         return summary_data
 
     except Exception as e:
-        return {"error": f"An unexpected error occurred while fetching summary for '{symbol}': {str(e)}"}
\ No newline at end of file
+        return {"error": f"An unexpected error occurred while fetching summary for '{symbol}': {str(e)}"}
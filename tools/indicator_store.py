@@ -0,0 +1,74 @@
+# tools/indicator_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# --- CONFIGURATION ---
+INDICATOR_DB = os.environ.get("INDICATOR_DB", os.path.join("cache", "indicators.sqlite3"))
+# Latest values kept per symbol, as produced by calculate_technical_indicators
+INDICATOR_COLUMNS = ["Close", "Volume", "SMA_10", "SMA_20", "EMA_10", "EMA_20", "RSI", "MACD", "Signal_Line", "MACD_Hist"]
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    """One connection per thread; WAL lets readers proceed while another process writes."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != INDICATOR_DB:
+        os.makedirs(os.path.dirname(INDICATOR_DB) or ".", exist_ok=True)
+        conn = sqlite3.connect(INDICATOR_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS latest_indicators ("
+            " symbol TEXT PRIMARY KEY,"
+            " as_of TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        _local.conn = conn
+        _local.path = INDICATOR_DB
+    return conn
+
+
+def latest_row(df_with_indicators: pd.DataFrame):
+    """Returns (as_of, {column: value}) for the last bar of an indicator frame."""
+    last = df_with_indicators.iloc[-1]
+    values = {column: float(last[column]) for column in INDICATOR_COLUMNS
+              if column in last.index and pd.notna(last[column])}
+    return pd.Timestamp(df_with_indicators.index[-1]).strftime("%Y-%m-%d"), values
+
+
+def put_many(rows):
+    """Upserts (symbol, as_of, values) rows in one transaction."""
+    now = time.time()
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO latest_indicators (symbol, as_of, data, updated_at) VALUES (?, ?, ?, ?)",
+            [(symbol.upper(), as_of, json.dumps(values, separators=(",", ":")), now) for symbol, as_of, values in rows],
+        )
+
+
+def put(symbol: str, df_with_indicators: pd.DataFrame):
+    if df_with_indicators.empty:
+        return
+    as_of, values = latest_row(df_with_indicators)
+    put_many([(symbol, as_of, values)])
+
+
+def version() -> tuple:
+    """Cheap change marker: (row count, latest update time)."""
+    return _connect().execute("SELECT COUNT(*), MAX(updated_at) FROM latest_indicators").fetchone()
+
+
+def load_all() -> pd.DataFrame:
+    """Returns one row per symbol with the latest indicator values, indexed by symbol."""
+    rows = _connect().execute("SELECT symbol, as_of, data FROM latest_indicators").fetchall()
+    records = [{"symbol": symbol, "indicators_as_of": as_of, **json.loads(data)} for symbol, as_of, data in rows]
+    df = pd.DataFrame.from_records(records, columns=["symbol", "indicators_as_of"] + INDICATOR_COLUMNS)
+    return df.set_index("symbol")
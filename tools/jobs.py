@@ -0,0 +1,260 @@
+# tools/jobs.py
+import asyncio
+import contextlib
+import contextvars
+from datetime import datetime
+import itertools
+import logging
+import os
+import queue
+import threading
+import uuid
+
+from tools import tracing
+
+# --- CONFIGURATION ---
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+MAX_FINISHED_JOBS = 200  # Older finished jobs are forgotten beyond this
+# Lower numbers run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation has been requested."""
+
+
+class Job:
+    """A long-running tool invocation with progress that clients can poll or stream."""
+
+    def __init__(self, kind: str, params: dict = None, priority: int = PRIORITY_INTERACTIVE):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.priority = priority
+        self.status = "queued"
+        self.progress = {"done": 0, "total": 0}
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0  # Bumped on every change so watchers know when to re-read
+        # The job's span joins the submitter's trace (e.g. the HTTP request that queued it)
+        self.trace_id = tracing.current_trace_id()
+        self._context = contextvars.copy_context()
+        self._cancel = threading.Event()
+        self._cond = threading.Condition()
+        self._watchers = []  # (event loop, asyncio.Event) of async waiters
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Call between units of work; raises JobCancelled if the job was cancelled."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def _bump(self):
+        """Publishes a change to thread and async waiters. Must be called with self._cond held."""
+        self.version += 1
+        self._cond.notify_all()
+        for loop, event in self._watchers:
+            with contextlib.suppress(RuntimeError):  # The waiter's loop has closed
+                loop.call_soon_threadsafe(event.set)
+
+    def _changed(self, **fields):
+        with self._cond:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._bump()
+
+    def update_progress(self, **progress):
+        with self._cond:
+            self.progress.update(progress)
+            self._bump()
+
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Blocks until the job changes past `version` (or timeout) and returns the current version."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+    async def wait_for_change_async(self, version: int, timeout: float) -> int:
+        """wait_for_change for the event loop: waits without holding a worker thread."""
+        watcher = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self.version != version:
+                return self.version
+            self._watchers.append(watcher)
+        try:
+            await asyncio.wait_for(watcher[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._watchers.remove(watcher)
+        with self._cond:
+            return self.version
+
+    def to_dict(self) -> dict:
+        with self._cond:
+            return {
+                "job_id": self.id,
+                "kind": self.kind,
+                "params": self.params,
+                "priority": self.priority,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "version": self.version,
+                "trace_id": self.trace_id,
+            }
+
+
+class JobQueue:
+    """
+    A bounded pool of worker threads that runs jobs in priority order.
+
+    Queued jobs can be cancelled outright; running jobs are cancelled
+    cooperatively the next time they call job.check_cancelled().
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = workers
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()  # FIFO order within a priority
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._seq), None, None))
+        for thread in threads:
+            thread.join(timeout=5)
+
+    def _work(self):
+        while True:
+            _, _, job, fn = self._queue.get()
+            if job is None:
+                return
+            self._run(job, fn)
+
+    def _run(self, job: Job, fn):
+        with job._cond:
+            if job._cancel.is_set():
+                return  # Cancelled while queued; already marked as such
+            job.status = "running"
+            job.started_at = datetime.now().isoformat()
+            job._bump()
+        job._context.run(self._execute, job, fn)
+
+    def _execute(self, job: Job, fn):
+        with tracing.span(f"job {job.kind}", job_id=job.id) as span:
+            job.trace_id = span.trace_id
+            try:
+                result = fn(job)
+                if isinstance(result, dict) and "error" in result:
+                    span.record_error(result["error"])
+                    job._changed(error=result["error"], status="failed", finished_at=datetime.now().isoformat())
+                else:
+                    job._changed(result=result, status="succeeded", finished_at=datetime.now().isoformat())
+            except JobCancelled:
+                span.set_attribute("cancelled", True)
+                job._changed(status="cancelled", finished_at=datetime.now().isoformat())
+            except Exception as e:
+                span.record_error(e)
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}", exc_info=True)
+                job._changed(error=str(e), status="failed", finished_at=datetime.now().isoformat())
+
+    def _forget_old_jobs(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:-MAX_FINISHED_JOBS or None]:
+            del self._jobs[job.id]
+
+    def submit(self, kind: str, fn, params: dict = None, priority: int = PRIORITY_INTERACTIVE) -> Job:
+        """Queues fn(job) and returns the job immediately."""
+        job = Job(kind, params, priority)
+        with self._lock:
+            self._forget_old_jobs()
+            self._jobs[job.id] = job
+        self.start()
+        self._queue.put((priority, next(self._seq), job, fn))
+        return job
+
+    def cancel(self, job_id: str):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        with job._cond:
+            job._cancel.set()
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = datetime.now().isoformat()
+            job._bump()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.to_dict() for job in jobs]
+
+    def depth(self) -> int:
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+
+_default_queue = JobQueue()
+
+
+def submit(kind: str, fn, params: dict = None, priority: int = PRIORITY_INTERACTIVE) -> Job:
+    return _default_queue.submit(kind, fn, params, priority)
+
+
+def cancel_job(job_id: str):
+    return _default_queue.cancel(job_id)
+
+
+def get_job(job_id: str):
+    return _default_queue.get(job_id)
+
+
+def list_jobs() -> list:
+    return _default_queue.list()
+
+
+def queue_depth() -> int:
+    return _default_queue.depth()
+
+
+def shutdown():
+    _default_queue.stop()
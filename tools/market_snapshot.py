@@ -0,0 +1,55 @@
+# tools/market_snapshot.py
+from datetime import datetime
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+from tools import metrics
+
+
+class MarketSnapshot:
+    """
+    Daily OHLCV history for one symbol, fetched once and shared by every stage
+    of a request (current price, indicators, forecast, report), so all of them
+    see the same data and the provider is only hit once.
+    """
+
+    def __init__(self, symbol: str, history: pd.DataFrame, fetched_at: datetime = None):
+        self.symbol = symbol.upper()
+        self.history = history
+        self.fetched_at = fetched_at or datetime.now()
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fetch(cls, symbol: str, period: str):
+        with metrics.stage("upstream_fetch", call="download", symbol=symbol.upper(), period=period):
+            history = yf.download(symbol, period=period, interval="1d", progress=False)
+        # *** FIX: FLATTEN MULTI-LEVEL COLUMNS ***
+        if isinstance(history.columns, pd.MultiIndex):
+            history.columns = history.columns.droplevel(1)
+        return cls(symbol, history)
+
+    @property
+    def empty(self) -> bool:
+        return self.history.empty
+
+    @property
+    def as_of(self):
+        """Date of the latest bar in the snapshot."""
+        return None if self.empty else self.history.index[-1]
+
+    @property
+    def current_price(self) -> float:
+        return round(float(self.history["Close"].iloc[-1]), 2)
+
+    def derive(self, name: str, fn):
+        """
+        Computes fn(history) once per snapshot and caches it under name, so
+        stages that need the same derived frame (e.g. indicators) share it.
+        """
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = fn(self.history)
+            return self._derived[name]
@@ -0,0 +1,138 @@
+# tools/offline_provider.py
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+# --- CONFIGURATION ---
+OFFLINE_FIXTURES_DIR = os.environ.get("OFFLINE_FIXTURES_DIR", os.path.join("benchmarks", "fixtures"))
+# Simulated upstream round trip per call, so offline runs still exercise overlap and queueing
+OFFLINE_LATENCY_MS = float(os.environ.get("OFFLINE_LATENCY_MS", 0))
+HISTORY_FILE = "history.parquet"
+PROFILES_FILE = "profiles.json"
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+TRADING_DAYS = {"d": 1, "wk": 5, "mo": 21, "y": 252}
+
+_installed = {}
+_install_lock = threading.Lock()
+
+
+def _period_bars(period: str, index: pd.DatetimeIndex) -> int:
+    """Trading bars covered by a yfinance period string such as "5d", "1mo", "2y", "ytd" or "max"."""
+    if period in (None, "max"):
+        return len(index)
+    if period == "ytd":
+        return int((index >= pd.Timestamp(index[-1].year, 1, 1)).sum())
+    for unit in sorted(TRADING_DAYS, key=len, reverse=True):
+        if period.endswith(unit) and period[:-len(unit)].isdigit():
+            return int(period[:-len(unit)]) * TRADING_DAYS[unit]
+    raise ValueError(f"Unsupported period '{period}'.")
+
+
+class OfflineProvider:
+    """
+    Replays recorded market data with the parts of the yfinance API the tools
+    use (download, Ticker.history, Ticker.info, Ticker.recommendations).
+
+    Fixtures are daily bars, so intraday intervals are answered with daily
+    bars too; periods are counted in trading days from the last recorded bar.
+    """
+
+    def __init__(self, fixtures_dir: str = OFFLINE_FIXTURES_DIR, latency_ms: float = OFFLINE_LATENCY_MS):
+        history_path = os.path.join(fixtures_dir, HISTORY_FILE)
+        if not os.path.exists(history_path):
+            raise FileNotFoundError(f"No market data fixtures in '{fixtures_dir}'. "
+                                    "Create them with: python -m benchmarks.fixtures --synthetic")
+        history = pd.read_parquet(history_path)
+        self.histories = {
+            symbol: frame.drop(columns="symbol").set_index("Date").sort_index()[PRICE_COLUMNS]
+            for symbol, frame in history.groupby("symbol")
+        }
+        with open(os.path.join(fixtures_dir, PROFILES_FILE)) as f:
+            self.profiles = json.load(f)
+        self.latency = latency_ms / 1000.0
+
+    @property
+    def symbols(self) -> list:
+        return sorted(self.histories)
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def history(self, symbol: str, period: str) -> pd.DataFrame:
+        frame = self.histories.get(symbol.upper())
+        if frame is None:
+            return pd.DataFrame(columns=PRICE_COLUMNS)
+        return frame.tail(_period_bars(period, frame.index)).copy()
+
+    def download(self, tickers, period: str = "1mo", interval: str = "1d", group_by: str = "column", **kwargs):
+        self._wait()
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        symbols = [s.upper() for s in symbols]
+        if len(symbols) == 1:
+            return self.history(symbols[0], period)
+        frames = {s: self.history(s, period) for s in symbols if s.upper() in self.histories}
+        if not frames:
+            return pd.DataFrame()
+        data = pd.concat(frames, axis=1)  # (Ticker, Price) columns
+        if group_by == "ticker":
+            return data
+        return data.swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+    def ticker(self, symbol: str):
+        return _OfflineTicker(self, symbol)
+
+
+class _OfflineTicker:
+    def __init__(self, provider: OfflineProvider, symbol: str):
+        self._provider = provider
+        self.ticker = symbol.upper()
+
+    def history(self, period: str = "1mo", interval: str = "1d", **kwargs) -> pd.DataFrame:
+        self._provider._wait()
+        frame = self._provider.history(self.ticker, period)
+        frame = frame.drop(columns="Adj Close")
+        frame["Dividends"] = 0.0
+        frame["Stock Splits"] = 0.0
+        return frame
+
+    @property
+    def info(self) -> dict:
+        self._provider._wait()
+        return dict(self._provider.profiles.get(self.ticker, {}).get("info", {"trailingPegRatio": None}))
+
+    @property
+    def recommendations(self):
+        self._provider._wait()
+        rows = self._provider.profiles.get(self.ticker, {}).get("recommendations", [])
+        if not rows:
+            return pd.DataFrame()
+        frame = pd.DataFrame(rows)
+        return frame.set_index(pd.to_datetime(frame.pop("Date")))
+
+
+def install(fixtures_dir: str = OFFLINE_FIXTURES_DIR, latency_ms: float = OFFLINE_LATENCY_MS) -> OfflineProvider:
+    """
+    Points yfinance's download and Ticker at the recorded fixtures for the rest
+    of the process. Every tool calls them through the yfinance module, so no
+    tool code changes; the live functions are kept for uninstall().
+    """
+    with _install_lock:
+        provider = OfflineProvider(fixtures_dir, latency_ms)
+        _installed.setdefault("download", yf.download)
+        _installed.setdefault("Ticker", yf.Ticker)
+        yf.download = provider.download
+        yf.Ticker = provider.ticker
+        return provider
+
+
+def uninstall():
+    with _install_lock:
+        if _installed:
+            yf.download = _installed.pop("download")
+            yf.Ticker = _installed.pop("Ticker")
+
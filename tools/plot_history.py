@@ -1,46 +1,182 @@
 import yfinance as yf
-import matplotlib.pyplot as plt
-import os
+import numpy as np
+import pandas as pd
 
+from tools import chart_renderer, metrics, render_cache
+from tools.downsample import downsample
+from tools.tracing import traced
+
+# --- CONFIGURATION ---
+PLOT_PERIOD = "1mo"
+PLOT_DPI = 300
+PLOT_TEMPLATE = "history"
+PLOT_COLOR = "blue"
+
+# Default bar interval for each supported range, so long ranges never pull intraday bars
+CHART_INTERVALS = {
+    "1d": "5m",
+    "5d": "15m",
+    "1mo": "1h",
+    "3mo": "1d",
+    "6mo": "1d",
+    "ytd": "1d",
+    "1y": "1d",
+    "2y": "1d",
+    "5y": "1wk",
+    "10y": "1wk",
+    "max": "1mo",
+}
+CHART_MAX_POINTS = 1000  # Default and upper bound for max_points
+CHART_MIN_POINTS = 3  # Fewer leaves nothing to downsample (LTTB keeps both endpoints)
+CHART_MAX_SYMBOLS = 10
+
+def _render_history_png(symbol: str, hist) -> bytes:
+    series = [{
+        "x": hist.index.to_pydatetime(),
+        "y": hist["Close"].to_numpy(),
+        "label": "Close Price",
+        "color": PLOT_COLOR,
+    }]
+    return chart_renderer.render(PLOT_TEMPLATE, f"{symbol.upper()} - 1 Month Price History", series, dpi=PLOT_DPI)
+
+@traced()
 def plot_stock_history(symbol: str):
     """
     Generates and saves a 30-day historical price trend graph for a given stock symbol.
 
+    Rendered charts are cached by content: repeated requests for the same symbol
+    and the same underlying data reuse the stored PNG instead of re-rendering it.
+
     Args:
         symbol (str): The stock ticker symbol (e.g., "AAPL", "GOOGL").
 
     Returns:
-        dict: A dictionary containing the symbol, a success message, and the plot file path,
-              or an error message if plotting fails.
+        dict: A dictionary containing the symbol, a success message, the plot file path
+              and its ETag, or an error message if plotting fails.
     """
     try:
         stock = yf.Ticker(symbol)
         # Fetch 1 month (approx. 30 days) of history
-        hist = stock.history(period="1mo")
+        with metrics.stage("upstream_fetch", call="Ticker.history", symbol=symbol.upper(), period=PLOT_PERIOD):
+            hist = stock.history(period=PLOT_PERIOD)
 
         if hist.empty:
             return {"error": f"No historical data found for '{symbol}'. Please check the symbol."}
 
-        plt.figure(figsize=(12, 6)) # Slightly larger figure for better readability
-        plt.plot(hist.index, hist["Close"], label="Close Price", color="blue", linewidth=1.5)
-        plt.title(f"{symbol.upper()} - 1 Month Price History", fontsize=16)
-        plt.xlabel("Date", fontsize=12)
-        plt.ylabel("Price", fontsize=12)
-        plt.grid(True, linestyle='--', alpha=0.7)
-        plt.legend(fontsize=10)
-        plt.xticks(rotation=45, ha='right') # Rotate dates for better readability
-        plt.tight_layout() # Adjust layout to prevent labels from overlapping
-
-        # Ensure the 'plots' directory exists
-        os.makedirs("plots", exist_ok=True)
-        filepath = f"plots/{symbol.upper()}_history.png"
-        plt.savefig(filepath, dpi=300) # Save with higher resolution
-        plt.close() # Close the plot to free up memory
+        last_bar = hist.iloc[-1]
+        cache_key = render_cache.make_cache_key(
+            symbol,
+            data_range=(PLOT_PERIOD, hist.index[0], hist.index[-1]),
+            last_bar=(last_bar["Open"], last_bar["High"], last_bar["Low"], last_bar["Close"], last_bar["Volume"]),
+            style={"template": chart_renderer.TEMPLATES[PLOT_TEMPLATE], "color": PLOT_COLOR},
+            dpi=PLOT_DPI,
+        )
+        filepath = render_cache.get_or_render(cache_key, lambda: _render_history_png(symbol, hist))
 
         return {
             "symbol": symbol.upper(),
             "message": "Plot generated successfully",
-            "plot_path": filepath
+            "plot_path": filepath,
+            "etag": cache_key
+        }
+    except Exception as e:
+        return {"error": f"Failed to generate plot for '{symbol}': {str(e)}"}
+
+
+def _extract_close_series(data, symbols):
+    """Splits a (possibly multi-ticker) yf.download frame into one Close series per symbol."""
+    close = data["Close"]
+    if isinstance(close, pd.Series):
+        return {symbols[0]: close.dropna()}
+    return {symbol: close[symbol].dropna() for symbol in symbols if symbol in close.columns}
+
+@traced(args=("period", "interval", "method"))
+def plot_price_chart(symbols, period: str = "1mo", interval: str = None, max_points: int = CHART_MAX_POINTS,
+                     method: str = "lttb", normalize: bool = False):
+    """
+    Generates a price chart for one or more symbols over any supported range.
+
+    All symbols are fetched in a single download, and each series is downsampled
+    on the server to at most `max_points` points, so a 20-year daily series costs
+    about as much to render and transfer as a one-month chart.
+
+    Args:
+        symbols (list): Stock ticker symbols (e.g., ["AAPL", "MSFT"]).
+        period (str): One of CHART_INTERVALS' keys (e.g., "1d", "1y", "max").
+        interval (str): Optional bar interval; defaults to a sensible one for the period.
+        max_points (int): Maximum plotted points per symbol, between
+                          CHART_MIN_POINTS and CHART_MAX_POINTS.
+        method (str): "lttb" or "minmax".
+        normalize (bool): Plot percent change from the first bar instead of price.
+
+    Returns:
+        dict: The symbols, plot file path, ETag and points plotted per symbol,
+              or an error message if plotting fails.
+    """
+    try:
+        symbols = list(dict.fromkeys(s.upper() for s in symbols))
+        if not symbols:
+            return {"error": "At least one symbol is required."}
+        if len(symbols) > CHART_MAX_SYMBOLS:
+            return {"error": f"At most {CHART_MAX_SYMBOLS} symbols can be charted at once."}
+        if period not in CHART_INTERVALS:
+            return {"error": f"Unsupported period '{period}'. Use one of: {', '.join(CHART_INTERVALS)}."}
+        if not CHART_MIN_POINTS <= max_points <= CHART_MAX_POINTS:
+            return {"error": f"max_points must be between {CHART_MIN_POINTS} and {CHART_MAX_POINTS}."}
+        interval = interval or CHART_INTERVALS[period]
+
+        with metrics.stage("upstream_fetch", call="download", symbols=",".join(symbols), period=period, interval=interval):
+            data = yf.download(symbols, period=period, interval=interval, progress=False)
+        if data.empty:
+            return {"error": f"No historical data found for {', '.join(symbols)}."}
+
+        closes = _extract_close_series(data, symbols)
+        closes = {symbol: series for symbol, series in closes.items() if not series.empty}
+        missing = [symbol for symbol in symbols if symbol not in closes]
+        if not closes:
+            return {"error": f"No historical data found for {', '.join(symbols)}."}
+
+        series = []
+        points = {}
+        for symbol, close in closes.items():
+            x, y = downsample(close.index.asi8, close.to_numpy(), max_points, method)
+            if normalize:
+                y = (y / y[0] - 1.0) * 100.0
+            x_dates = pd.DatetimeIndex(x.astype(np.int64))
+            if close.index.tz is not None:
+                x_dates = x_dates.tz_localize("UTC").tz_convert(close.index.tz)
+            series.append({
+                "x": x_dates.to_pydatetime(),
+                "y": y,
+                "label": symbol,
+            })
+            points[symbol] = len(x)
+
+        cache_key = render_cache.make_cache_key(
+            ",".join(closes),
+            data_range=(period, interval, min(c.index[0] for c in closes.values()), max(c.index[-1] for c in closes.values())),
+            last_bar=tuple(float(c.iloc[-1]) for c in closes.values()),
+            style={"template": chart_renderer.TEMPLATES[PLOT_TEMPLATE], "max_points": max_points,
+                   "method": method, "normalize": normalize},
+            dpi=PLOT_DPI,
+        )
+        title = f"{', '.join(closes)} - {period} Price History ({interval} bars)"
+        ylabel = "Change (%)" if normalize else "Price"
+        filepath = render_cache.get_or_render(
+            cache_key, lambda: chart_renderer.render(PLOT_TEMPLATE, title, series, ylabel=ylabel, dpi=PLOT_DPI)
+        )
+
+        result = {
+            "symbols": list(closes),
+            "period": period,
+            "interval": interval,
+            "points": points,
+            "message": "Plot generated successfully",
+            "plot_path": filepath,
+            "etag": cache_key
         }
+        if missing:
+            result["missing_symbols"] = missing
+        return result
     except Exception as e:
-        return {"error": f"Failed to generate plot for '{symbol}': {str(e)}"}
\ No newline at end of file
+        return {"error": f"Failed to generate chart for {', '.join(symbols)}: {str(e)}"}
@@ -1,13 +1,16 @@
 # tools/predict_price.py
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
-import pandas as pd
-import yfinance as yf
 from tensorflow.keras.models import load_model
 import joblib
 import os
 import json
 import logging
 
+from tools.market_snapshot import MarketSnapshot
+from tools import indicator_store, metrics, tracing
+
 # --- CONFIGURATION ---
 MODELS_DIR = "models"
 MODEL_NAME = "lstm_stock_predictor.keras"
@@ -58,43 +61,123 @@ def calculate_technical_indicators(df):
     df_calc['MACD_Hist'] = df_calc['MACD'] - df_calc['Signal_Line']
     return df_calc
 
-def predict_stock_price(symbol: str):
-    if model is None:
-        return {"error": "Model not loaded. Please train the model first by running train_model.py"}
+def record_latest_indicators(symbol: str, df_with_indicators):
+    """Keeps the screener's indicator table current; never fails a forecast."""
+    try:
+        indicator_store.put(symbol, df_with_indicators)
+    except Exception as e:
+        logger.warning(f"Could not record indicators for '{symbol}': {e}")
 
-    period_to_fetch = f"{LOOKBACK + 60}d"
-    df_original = yf.download(symbol, period=period_to_fetch, interval="1d")
-    
-    # *** FIX: FLATTEN MULTI-LEVEL COLUMNS ***
-    if isinstance(df_original.columns, pd.MultiIndex):
-        df_original.columns = df_original.columns.droplevel(1)
+def fetch_market_snapshot(symbol: str) -> MarketSnapshot:
+    """Fetches enough daily history for a forecast (and the current price) in one download."""
+    lookback = LOOKBACK if model is not None else 60
+    return MarketSnapshot.fetch(symbol, period=f"{lookback + 60}d")
+
+@tracing.traced()
+def prepare_model_input(symbol: str, snapshot: MarketSnapshot):
+    """
+    Turns a snapshot into one scaled LOOKBACK window for the model.
+
+    Returns:
+        tuple: (X, None) where X has shape (1, LOOKBACK, n_features),
+               or (None, error_dict) if the data is insufficient.
+    """
+    df_original = snapshot.history
 
     if df_original.empty or len(df_original) < LOOKBACK:
-        return {"error": f"Not enough historical data for '{symbol}' to make a prediction."}
+        return None, {"error": f"Not enough historical data for '{symbol}' to make a prediction."}
 
-    df_with_indicators = calculate_technical_indicators(df_original)
+    with metrics.stage("indicators"):
+        df_with_indicators = snapshot.derive("indicators", calculate_technical_indicators)
+    record_latest_indicators(symbol, df_with_indicators)
     df_features = df_with_indicators[FEATURES_LIST].dropna()
 
     if len(df_features) < LOOKBACK:
-        return {"error": f"Insufficient data for '{symbol}' after feature engineering. Need at least {LOOKBACK} days."}
+        return None, {"error": f"Insufficient data for '{symbol}' after feature engineering. Need at least {LOOKBACK} days."}
 
     last_sequence_raw = df_features.tail(LOOKBACK)
-    scaled_sequence = scaler.transform(last_sequence_raw)
-    X_pred = np.reshape(scaled_sequence, (1, LOOKBACK, len(FEATURES_LIST)))
-    
-    predicted_scaled_prices = model.predict(X_pred)[0]
+    with metrics.stage("scaler_transform"):
+        scaled_sequence = scaler.transform(last_sequence_raw)
+    return np.reshape(scaled_sequence, (1, LOOKBACK, len(FEATURES_LIST))), None
 
-    dummy_array = np.zeros((len(predicted_scaled_prices), len(FEATURES_LIST)))
-    dummy_array[:, CLOSE_COLUMN_INDEX] = predicted_scaled_prices
-    inversed_prices = scaler.inverse_transform(dummy_array)[:, CLOSE_COLUMN_INDEX]
-    
-    current_price = df_original['Close'].iloc[-1]
-    
-    predictions = {f"Day +{i+1}": round(float(price), 2) for i, price in enumerate(inversed_prices)}
+@tracing.traced()
+def predict_batch(X_batch):
+    """
+    Runs the model once over stacked windows of shape (n, LOOKBACK, n_features)
+    and returns an (n, N_STEPS_AHEAD) array of prices in the original scale.
+    """
+    with metrics.stage("model_predict"):
+        predicted_scaled_prices = model.predict(X_batch, verbose=0)
+
+    n, steps = predicted_scaled_prices.shape
+    dummy_array = np.zeros((n * steps, len(FEATURES_LIST)))
+    dummy_array[:, CLOSE_COLUMN_INDEX] = predicted_scaled_prices.reshape(-1)
+    with metrics.stage("scaler_inverse_transform"):
+        inversed_prices = scaler.inverse_transform(dummy_array)[:, CLOSE_COLUMN_INDEX]
+    return inversed_prices.reshape(n, steps)
+
+def format_prediction(symbol: str, current_price: float, prices):
+    predictions = {f"Day +{i+1}": round(float(price), 2) for i, price in enumerate(prices)}
 
     return {
         "symbol": symbol.upper(),
         "current_price": round(float(current_price), 2),
         "predictions": predictions,
         "note": f"LSTM forecast for the next {N_STEPS_AHEAD} trading days. Not financial advice."
-    }
\ No newline at end of file
+    }
+
+@tracing.traced()
+def predict_stock_price(symbol: str, snapshot: MarketSnapshot = None):
+    if model is None:
+        return {"error": "Model not loaded. Please train the model first by running train_model.py"}
+
+    if snapshot is None:
+        snapshot = fetch_market_snapshot(symbol)
+
+    X_pred, error = prepare_model_input(symbol, snapshot)
+    if error:
+        return error
+
+    inversed_prices = predict_batch(X_pred)[0]
+    return format_prediction(symbol, snapshot.current_price, inversed_prices)
+
+@tracing.traced()
+def predict_stock_prices(symbols, max_workers: int = 8) -> dict:
+    """
+    Forecasts several symbols at once: histories are fetched concurrently and
+    every window goes through the model in a single batched call.
+
+    Returns:
+        dict: {symbol: prediction or error dict}
+    """
+    if model is None:
+        return {symbol.upper(): {"error": "Model not loaded. Please train the model first by running train_model.py"} for symbol in symbols}
+
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    if not symbols:
+        return {}
+
+    def fetch(symbol):
+        try:
+            return fetch_market_snapshot(symbol), None
+        except Exception as e:
+            return None, {"error": f"Failed to fetch history for '{symbol}': {str(e)}"}
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(symbols)))) as executor:
+        fetched = list(executor.map(tracing.in_context(fetch), symbols))
+
+    results = {}
+    ready = []
+    for symbol, (snapshot, error) in zip(symbols, fetched):
+        if snapshot is not None:
+            X, error = prepare_model_input(symbol, snapshot)
+        if error:
+            results[symbol] = error
+        else:
+            ready.append((symbol, snapshot.current_price, X))
+
+    if ready:
+        prices = predict_batch(np.concatenate([X for _, _, X in ready]))
+        for (symbol, current_price, _), forecast in zip(ready, prices):
+            results[symbol] = format_prediction(symbol, current_price, forecast)
+    return {symbol: results[symbol] for symbol in symbols}
@@ -0,0 +1,208 @@
+# tools/price_log_writer.py
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+
+from tools import metrics, price_store, tick_log
+
+try:
+    import fcntl  # POSIX advisory locks keep multiple worker processes from interleaving batches
+except ImportError:  # Windows: batches are still serialized within this process
+    fcntl = None
+
+# --- CONFIGURATION ---
+# "parquet" writes date/symbol-partitioned segments (see tools/price_store.py),
+# "binary" writes fixed-width tick records (see tools/tick_log.py), "csv" keeps the flat file
+LOG_FORMAT = os.environ.get("PRICE_LOG_FORMAT", "parquet")
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "stock_prices.csv")
+LOG_HEADER = ["Timestamp", "Symbol", "Price"]
+FLUSH_BATCH_SIZE = int(os.environ.get("PRICE_LOG_FLUSH_BATCH_SIZE", 500))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("PRICE_LOG_FLUSH_INTERVAL", 1.0))
+# Failed flushes are retried after flush_interval, doubling up to this
+FLUSH_MAX_BACKOFF_SECONDS = float(os.environ.get("PRICE_LOG_FLUSH_MAX_BACKOFF", 60.0))
+# Rows held while the log cannot be written; rows beyond this are dropped (and counted)
+MAX_PENDING_ROWS = int(os.environ.get("PRICE_LOG_MAX_PENDING_ROWS", 100_000))
+
+logger = logging.getLogger(__name__)
+
+
+class PriceLogWriter:
+    """
+    Buffers price-log rows in memory and writes them to the price log in batches.
+
+    A batch is flushed when FLUSH_BATCH_SIZE rows are queued or FLUSH_INTERVAL_SECONDS
+    have passed, whichever comes first. In CSV mode each flush is a single locked
+    append followed by fsync, so one syscall round trip covers the whole batch and
+    rows from different processes never interleave. In Parquet mode each flush
+    becomes one atomically renamed chunk per partition, and in binary mode one
+    O_APPEND write of packed records per day.
+
+    While the log cannot be written (a full disk, a read-only volume) flushes
+    back off exponentially and at most max_pending rows are held; further rows
+    are dropped and the count is logged.
+    """
+
+    def __init__(self, path: str = None, batch_size: int = FLUSH_BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, log_format: str = LOG_FORMAT,
+                 max_pending: int = MAX_PENDING_ROWS):
+        self.log_format = log_format
+        default_paths = {"parquet": price_store.STORE_DIR, "binary": tick_log.TICK_DIR, "csv": LOG_FILE}
+        if log_format not in default_paths:
+            raise ValueError(f"Unknown price log format '{log_format}'. Use one of: {', '.join(default_paths)}.")
+        self.path = path or default_paths[log_format]
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.dropped = 0  # Rows dropped because the buffer was full
+        self._unreported_drops = 0
+        self._rows = []
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="price-log-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, timestamp: str, symbol: str, price: float):
+        self.add_many([(timestamp, symbol, price)])
+
+    def add_many(self, rows):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Price log writer is closed.")
+            rows = list(rows)
+            room = max(0, self.max_pending - len(self._rows))
+            if len(rows) > room:
+                self._count_dropped(len(rows) - room)
+                rows = rows[:room]
+            self._rows.extend(rows)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._rows)
+
+    def _count_dropped(self, count: int):
+        # Called with self._cond held
+        self.dropped += count
+        self._unreported_drops += count
+
+    def _report_drops(self):
+        with self._cond:
+            count, self._unreported_drops = self._unreported_drops, 0
+        if count:
+            logger.warning(f"Dropped {count} price log rows because {self.max_pending} rows were already "
+                           f"waiting to be written ({self.dropped} dropped in total).")
+
+    def _run(self):
+        backoff = 0.0  # Seconds to wait before retrying after a failed flush
+        while True:
+            with self._cond:
+                if backoff:
+                    # Sleep out the backoff even if the buffer fills up; only close() cuts it short
+                    deadline = time.monotonic() + backoff
+                    while not self._closed and time.monotonic() < deadline:
+                        self._cond.wait(timeout=deadline - time.monotonic())
+                elif not self._closed and len(self._rows) < self.batch_size:
+                    self._cond.wait(timeout=self.flush_interval)
+                closed = self._closed
+            try:
+                self.flush()
+                backoff = 0.0
+            except Exception as e:
+                first_failure = not backoff
+                backoff = min(max(backoff * 2, self.flush_interval, 0.1), FLUSH_MAX_BACKOFF_SECONDS)
+                logger.error(f"Failed to flush price log; retrying in {backoff:g}s: {e}", exc_info=first_failure)
+            self._report_drops()
+            if closed:
+                return
+
+    def _append_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        payload = buffer.getvalue()
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, mode='a', newline='') as file:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                # Checked under the lock so only one process ever writes the header
+                if os.fstat(file.fileno()).st_size == 0:
+                    header = io.StringIO()
+                    csv.writer(header).writerow(LOG_HEADER)
+                    payload = header.getvalue() + payload
+                file.write(payload)
+                file.flush()
+                os.fsync(file.fileno())
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    def flush(self):
+        """Writes every queued row to disk."""
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+
+            try:
+                with metrics.stage("file_write"):
+                    if self.log_format == "parquet":
+                        price_store.write_batch(rows)
+                    elif self.log_format == "binary":
+                        tick_log.append(rows)
+                    else:
+                        self._append_csv(rows)
+            except Exception:
+                # Put the batch back so it is retried on the next flush, keeping within max_pending
+                with self._cond:
+                    self._rows[:0] = rows
+                    if len(self._rows) > self.max_pending:
+                        self._count_dropped(len(self._rows) - self.max_pending)
+                        del self._rows[self.max_pending:]
+                raise
+            return len(rows)
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> PriceLogWriter:
+    """Returns the process-wide price log writer, starting it on first use."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PriceLogWriter()
+            atexit.register(_writer.close)
+        return _writer
+
+
+def shutdown():
+    global _writer
+    with _writer_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
+def pending_rows() -> int:
+    """Rows queued on the shared writer, without starting one."""
+    return _writer.pending() if _writer is not None else 0
@@ -0,0 +1,236 @@
+# tools/price_store.py
+import contextlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- CONFIGURATION ---
+STORE_DIR = os.path.join("logs", "price_log")
+CHUNK_PREFIX = "chunk-"
+COMPACTED_PREFIX = "compacted-"
+LOCK_NAME = ".lock"
+# A partition is compacted once it has at least this many small chunk files
+COMPACT_MIN_CHUNKS = int(os.environ.get("PRICE_STORE_COMPACT_MIN_CHUNKS", 8))
+COMPACT_INTERVAL_SECONDS = float(os.environ.get("PRICE_STORE_COMPACT_INTERVAL", 300))
+
+logger = logging.getLogger(__name__)
+
+# Layout: STORE_DIR/date=YYYY-MM-DD/symbol=XXX/{chunk,compacted}-*.parquet
+
+
+def _partition_dir(date: str, symbol: str) -> str:
+    return os.path.join(STORE_DIR, f"date={date}", f"symbol={symbol}")
+
+
+@contextlib.contextmanager
+def _partition_lock(partition: str, exclusive: bool):
+    """Shared lock for readers, exclusive lock while compaction swaps files."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(partition, LOCK_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _write_parquet_atomic(df: pd.DataFrame, directory: str, prefix: str) -> str:
+    name = f"{prefix}{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    df.to_parquet(tmp_path, index=False)
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return path
+
+
+def _to_frame(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["timestamp", "symbol", "price"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["symbol"] = df["symbol"].astype(str).str.upper()
+    df["price"] = df["price"].astype("float64")
+    return df
+
+
+def write_batch(rows) -> int:
+    """
+    Appends (timestamp, symbol, price) rows as one small Parquet chunk per
+    date/symbol partition touched by the batch.
+    """
+    if not rows:
+        return 0
+    df = _to_frame(rows)
+    dates = df["timestamp"].dt.strftime("%Y-%m-%d")
+    for (date, symbol), part in df.groupby([dates, df["symbol"]], sort=False):
+        partition = _partition_dir(date, symbol)
+        os.makedirs(partition, exist_ok=True)
+        _write_parquet_atomic(part.sort_values("timestamp"), partition, CHUNK_PREFIX)
+    return len(df)
+
+
+def _list_partitions(symbols=None, start=None, end=None):
+    """Yields partition directories whose date and symbol can match the query."""
+    if not os.path.isdir(STORE_DIR):
+        return
+    start_date = start.strftime("%Y-%m-%d") if start is not None else None
+    end_date = end.strftime("%Y-%m-%d") if end is not None else None
+    wanted = {s.upper() for s in symbols} if symbols else None
+
+    for date_entry in sorted(os.listdir(STORE_DIR)):
+        if not date_entry.startswith("date="):
+            continue
+        date = date_entry[len("date="):]
+        # ISO dates compare correctly as strings
+        if (start_date and date < start_date) or (end_date and date > end_date):
+            continue
+        date_dir = os.path.join(STORE_DIR, date_entry)
+        for symbol_entry in sorted(os.listdir(date_dir)):
+            if not symbol_entry.startswith("symbol="):
+                continue
+            if wanted is not None and symbol_entry[len("symbol="):] not in wanted:
+                continue
+            yield os.path.join(date_dir, symbol_entry)
+
+
+def _data_files(partition: str):
+    return sorted(
+        os.path.join(partition, name) for name in os.listdir(partition)
+        if name.endswith(".parquet") and not name.startswith(".")
+    )
+
+
+def _naive_bound(value) -> pd.Timestamp:
+    """Logged timestamps are naive local time, so tz-aware bounds are converted to local time first."""
+    bound = pd.Timestamp(value)
+    if bound.tzinfo is not None:
+        bound = pd.Timestamp(bound.to_pydatetime().astimezone()).tz_localize(None)
+    return bound
+
+
+def query(symbols=None, start=None, end=None, limit: int = None) -> pd.DataFrame:
+    """
+    Reads logged prices, opening only the partitions that match the symbols and
+    date range, and pushing the exact time bounds down into the Parquet reader.
+
+    Args:
+        symbols (list): Optional symbols to include.
+        start, end: Optional inclusive time bounds (anything pd.Timestamp accepts;
+                    bounds with a time zone, e.g. "2024-05-01T00:00:00Z", are
+                    converted to the local time prices are logged in).
+        limit (int): Optional cap on the number of most recent rows returned.
+
+    Returns:
+        pd.DataFrame: timestamp, symbol and price columns sorted by time.
+
+    Raises:
+        ValueError: For unparseable bounds or a negative limit.
+    """
+    if limit is not None and limit < 0:
+        raise ValueError(f"limit must be non-negative, got {limit}.")
+    start = _naive_bound(start) if start is not None else None
+    end = _naive_bound(end) if end is not None else None
+    filters = []
+    if start is not None:
+        filters.append(("timestamp", ">=", start))
+    if end is not None:
+        filters.append(("timestamp", "<=", end))
+
+    frames = []
+    for partition in _list_partitions(symbols, start, end):
+        with _partition_lock(partition, exclusive=False):
+            for path in _data_files(partition):
+                frames.append(pd.read_parquet(path, filters=filters or None))
+
+    if not frames:
+        return _to_frame([])
+    df = pd.concat(frames, ignore_index=True).sort_values(["timestamp", "symbol"], ignore_index=True)
+    if limit is not None:
+        df = df.tail(limit).reset_index(drop=True)
+    return df
+
+
+def compact_partition(partition: str, closed: bool = False) -> bool:
+    """
+    Merges a partition's chunk files (and any earlier compacted file) into one
+    Parquet file. Open partitions wait for COMPACT_MIN_CHUNKS chunks; closed
+    ones (past dates) are merged as soon as they hold more than one file.
+    """
+    with _partition_lock(partition, exclusive=True):
+        files = _data_files(partition)
+        chunks = [f for f in files if os.path.basename(f).startswith(CHUNK_PREFIX)]
+        if not chunks or (len(chunks) < COMPACT_MIN_CHUNKS and not (closed and len(files) > 1)):
+            return False
+        df = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True).sort_values("timestamp")
+        _write_parquet_atomic(df, partition, COMPACTED_PREFIX)
+        for f in files:
+            os.remove(f)
+    return True
+
+
+def compact() -> int:
+    """Compacts every partition that has accumulated enough small chunks."""
+    compacted = 0
+    today = f"date={pd.Timestamp.now().strftime('%Y-%m-%d')}"
+    for partition in _list_partitions():
+        closed = os.path.basename(os.path.dirname(partition)) < today
+        try:
+            compacted += compact_partition(partition, closed=closed)
+        except Exception as e:
+            logger.error(f"Failed to compact {partition}: {e}", exc_info=True)
+    return compacted
+
+
+class Compactor:
+    """Runs compact() every COMPACT_INTERVAL_SECONDS on a background thread."""
+
+    def __init__(self, interval: float = COMPACT_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            count = compact()
+            if count:
+                logger.info(f"Compacted {count} price log partitions.")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="price-store-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def import_csv(csv_path: str) -> int:
+    """Loads a legacy logs/stock_prices.csv file into the partitioned store."""
+    df = pd.read_csv(csv_path)
+    rows = list(df[["Timestamp", "Symbol", "Price"]].itertuples(index=False, name=None))
+    count = write_batch(rows)
+    compact()
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--import-csv":
+        print(f"Imported {import_csv(sys.argv[2])} rows into {STORE_DIR}")
+    else:
+        print(f"Compacted {compact()} partitions in {STORE_DIR}")
@@ -0,0 +1,238 @@
+# tools/profile_ingest.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from tools import jobs, metrics, profile_store, tracing
+from tools.get_stock_summary import refresh_profile
+from tools.watchlists import DEFAULT_WATCHLIST, get_watchlist
+
+# --- CONFIGURATION ---
+INGEST_WORKERS = int(os.environ.get("PROFILE_INGEST_WORKERS", 8))
+# Global limit on upstream calls (ticker.info, ticker.recommendations) across all workers
+INGEST_RATE_PER_SECOND = float(os.environ.get("PROFILE_INGEST_RATE", 4))
+INGEST_BURST = int(os.environ.get("PROFILE_INGEST_BURST", 8))
+INGEST_MAX_ATTEMPTS = 3
+INGEST_BACKOFF_SECONDS = 2.0
+# Retries allowed per run, as a fraction of symbols (with a floor), so an outage fails fast
+# instead of multiplying load on the upstream API
+RETRY_BUDGET_RATIO = 0.2
+RETRY_BUDGET_MIN = 5
+# Scheduled full-universe refresh; 0 disables it
+PROFILE_REFRESH_INTERVAL_SECONDS = float(os.environ.get("PROFILE_REFRESH_INTERVAL_SECONDS", 6 * 3600))
+PROFILE_REFRESH_WATCHLIST = os.environ.get("PROFILE_REFRESH_WATCHLIST", DEFAULT_WATCHLIST)
+PROFILE_REFRESH_LOCK_FILE = os.path.join("cache", ".profile_refresh.lock")
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket shared by every ingestion worker."""
+
+    def __init__(self, rate: float = INGEST_RATE_PER_SECOND, burst: int = INGEST_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class RetryBudget:
+    """A fixed number of retries shared by one ingestion run."""
+
+    def __init__(self, total: int):
+        self.remaining = total
+        self._lock = threading.Lock()
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+def _make_upstream(limiter: RateLimiter, budget: RetryBudget, cancelled):
+    """Wraps each upstream call with the rate limiter and the shared retry budget."""
+    def upstream(fn):
+        for attempt in range(1, INGEST_MAX_ATTEMPTS + 1):
+            if cancelled():
+                raise jobs.JobCancelled()
+            limiter.acquire()
+            try:
+                with metrics.stage("upstream_fetch", attempt=attempt):
+                    return fn()
+            except Exception:
+                if attempt == INGEST_MAX_ATTEMPTS or not budget.spend():
+                    raise
+            time.sleep(INGEST_BACKOFF_SECONDS * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+    return upstream
+
+
+def ingest_profiles(symbols, job=None, force: bool = False, workers: int = INGEST_WORKERS,
+                    limiter: RateLimiter = None) -> dict:
+    """
+    Refreshes the cached profiles of many symbols concurrently. Only stale
+    field groups are fetched unless force is set; every upstream call shares
+    one rate limiter and one retry budget.
+    """
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    limiter = limiter or RateLimiter()
+    budget = RetryBudget(max(RETRY_BUDGET_MIN, int(len(symbols) * RETRY_BUDGET_RATIO)))
+    cancel_event = threading.Event()
+
+    def cancelled() -> bool:
+        if job is not None and job.cancel_requested:
+            cancel_event.set()
+        return cancel_event.is_set()
+
+    upstream = _make_upstream(limiter, budget, cancelled)
+
+    def ingest_one(symbol):
+        try:
+            _, error = refresh_profile(symbol, upstream=upstream, force=force)
+        except jobs.JobCancelled:
+            raise
+        except Exception as e:
+            error = str(e)
+        return symbol, error
+
+    errors = {}
+    done = 0
+    if job is not None:
+        job.update_progress(done=0, total=len(symbols))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="profile-ingest") as executor:
+        futures = [executor.submit(tracing.in_context(ingest_one), symbol) for symbol in symbols]
+        try:
+            for future in as_completed(futures):
+                symbol, error = future.result()
+                if error:
+                    errors[symbol] = error
+                done += 1
+                if job is not None:
+                    job.update_progress(done=done)
+                if cancelled():
+                    break
+        except jobs.JobCancelled:
+            cancel_event.set()
+        if cancel_event.is_set():
+            for future in futures:
+                future.cancel()
+
+    if cancel_event.is_set():
+        raise jobs.JobCancelled()
+    return {
+        "requested": len(symbols),
+        "ingested": done - len(errors),
+        "errors": errors,
+        "retries_left": budget.remaining,
+    }
+
+
+def refresh_universe(job=None) -> dict:
+    """Refreshes every symbol in the profile store plus the refresh watchlist."""
+    symbols = sorted(set(profile_store.all_symbols()) | set(get_watchlist(PROFILE_REFRESH_WATCHLIST)))
+    return ingest_profiles(symbols, job)
+
+
+class ProfileRefresher:
+    """
+    Submits refresh_universe() as a bulk-priority job every
+    PROFILE_REFRESH_INTERVAL_SECONDS. Only the worker process holding the
+    refresh lock schedules it, and a new run is skipped while the last one
+    is still queued or running.
+    """
+
+    def __init__(self, interval: float = PROFILE_REFRESH_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_job = None
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _is_leader(self) -> bool:
+        if fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(PROFILE_REFRESH_LOCK_FILE), exist_ok=True)
+        lock_file = open(PROFILE_REFRESH_LOCK_FILE, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file  # Held for the life of the process
+        return True
+
+    def run_once(self):
+        if self.last_job is not None and not self.last_job.finished:
+            return self.last_job
+        self.last_job = jobs.submit("profile_refresh", refresh_universe,
+                                    params={"watchlist": PROFILE_REFRESH_WATCHLIST}, priority=jobs.PRIORITY_BULK)
+        logger.info(f"Scheduled profile refresh as job {self.last_job.id}.")
+        return self.last_job
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self._is_leader():
+                self.run_once()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="profile-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Bulk-ingest company profiles into the profile store.")
+    parser.add_argument("symbols", nargs="*", help="Ticker symbols to ingest")
+    parser.add_argument("--watchlist", help="Ingest every symbol of a saved watchlist")
+    parser.add_argument("--file", help="Read symbols from a file, one per line")
+    parser.add_argument("--all", action="store_true", help="Refresh every cached symbol plus the refresh watchlist")
+    parser.add_argument("--force", action="store_true", help="Re-fetch groups that are still fresh")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.watchlist:
+        symbols.extend(get_watchlist(args.watchlist))
+    if args.file:
+        with open(args.file, 'r') as f:
+            symbols.extend(line.strip() for line in f if line.strip())
+    if args.all:
+        symbols.extend(profile_store.all_symbols())
+        symbols.extend(get_watchlist(PROFILE_REFRESH_WATCHLIST))
+    if not symbols:
+        parser.error("no symbols given")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - [trace=%(trace_id)s] %(message)s')
+    result = ingest_profiles(symbols, force=args.force, workers=args.workers)
+    print(json.dumps(result, indent=4))
@@ -0,0 +1,102 @@
+# tools/profile_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURATION ---
+PROFILE_DB = os.environ.get("PROFILE_DB", os.path.join("cache", "profiles.sqlite3"))
+
+# Each group of fields is refreshed on its own schedule
+FIELD_GROUPS = {
+    # Market-driven numbers move daily
+    "fundamentals": ["marketCap", "trailingPE", "beta", "fiftyTwoWeekHigh", "fiftyTwoWeekLow", "trailingPegRatio"],
+    # Descriptive profile text rarely changes
+    "profile": ["symbol", "shortName", "sector", "industry", "longBusinessSummary"],
+    # Built from ticker.recommendations rather than ticker.info
+    "recommendation": ["latest_recommendation"],
+}
+GROUP_TTL_SECONDS = {
+    "fundamentals": 24 * 3600,
+    "profile": 7 * 24 * 3600,
+    "recommendation": 24 * 3600,
+}
+INFO_GROUPS = ("fundamentals", "profile")
+
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    """One connection per thread; WAL lets readers proceed while another process writes."""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != PROFILE_DB:
+        os.makedirs(os.path.dirname(PROFILE_DB) or ".", exist_ok=True)
+        conn = sqlite3.connect(PROFILE_DB, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS profile_fields ("
+            " symbol TEXT NOT NULL,"
+            " field_group TEXT NOT NULL,"
+            " data TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (symbol, field_group))"
+        )
+        _local.conn = conn
+        _local.path = PROFILE_DB
+    return conn
+
+
+def get(symbol: str) -> dict:
+    """
+    Returns {group: (data, fetched_at)} for every cached group of a symbol,
+    fresh or not.
+    """
+    rows = _connect().execute(
+        "SELECT field_group, data, fetched_at FROM profile_fields WHERE symbol = ?", (symbol.upper(),)
+    ).fetchall()
+    return {group: (json.loads(data), fetched_at) for group, data, fetched_at in rows}
+
+
+def stale_groups(cached: dict, groups=FIELD_GROUPS, now: float = None) -> list:
+    """Lists the groups that are missing from `cached` or older than their TTL."""
+    now = now or time.time()
+    return [
+        group for group in groups
+        if group not in cached or now - cached[group][1] > GROUP_TTL_SECONDS[group]
+    ]
+
+
+def put(symbol: str, groups: dict, fetched_at: float = None):
+    """Stores {group: data} for a symbol in one transaction."""
+    fetched_at = fetched_at or time.time()
+    conn = _connect()
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO profile_fields (symbol, field_group, data, fetched_at) VALUES (?, ?, ?, ?)",
+            [(symbol.upper(), group, json.dumps(data, default=str, separators=(",", ":")), fetched_at) for group, data in groups.items()],
+        )
+
+
+def split_info(info: dict) -> dict:
+    """Splits a yfinance info dict into the cached field groups."""
+    return {group: {field: info.get(field) for field in FIELD_GROUPS[group]} for group in INFO_GROUPS}
+
+
+def all_symbols() -> list:
+    rows = _connect().execute("SELECT DISTINCT symbol FROM profile_fields ORDER BY symbol").fetchall()
+    return [row[0] for row in rows]
+
+
+def load_group(group: str) -> dict:
+    """Returns {symbol: data} for one group across every cached symbol."""
+    rows = _connect().execute(
+        "SELECT symbol, data FROM profile_fields WHERE field_group = ?", (group,)
+    ).fetchall()
+    return {symbol: json.loads(data) for symbol, data in rows}
+
+
+def version() -> tuple:
+    """Cheap change marker: (row count, latest fetch time)."""
+    return _connect().execute("SELECT COUNT(*), MAX(fetched_at) FROM profile_fields").fetchone()
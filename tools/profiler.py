@@ -0,0 +1,140 @@
+# tools/profiler.py
+from collections import Counter
+import functools
+import os
+import sys
+import threading
+import time
+
+from tools import tracing
+
+# --- CONFIGURATION ---
+PROFILE_DEFAULT_SECONDS = 10.0
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", 120))
+PROFILE_DEFAULT_INTERVAL_MS = 10.0  # ~100 samples/s per thread; overhead stays around 1% of a core
+PROFILE_MIN_INTERVAL_MS = 1.0
+PROFILE_MAX_DEPTH = 128
+PROFILE_LABEL_CACHE_SIZE = 8192  # Distinct code objects whose frame labels are kept
+
+_active = threading.Lock()  # One profile at a time per process
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+@functools.lru_cache(maxsize=PROFILE_LABEL_CACHE_SIZE)
+def _frame_label(code) -> str:
+    """Formats a frame once per code object rather than scanning sys.path on every sample."""
+    filename = code.co_filename
+    for root in sys.path:
+        if root and filename.startswith(root):
+            filename = os.path.relpath(filename, root)
+            break
+    # Semicolons separate frames in the collapsed format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _is_request_root(span) -> bool:
+    """
+    An HTTP request's root span is opened by async middleware, so while it is
+    the innermost span the event loop may be running any request's code.
+    """
+    return span.parent is None and "http.request.method" in span.attributes
+
+
+def _endpoint_label(span) -> str:
+    """The request (or job) a thread is working for: the name of its root span."""
+    return span.lineage()[0].name
+
+
+def _matches(span, endpoint: str) -> bool:
+    """True when any open span on the thread is the endpoint, e.g. "/tools/predict_price",
+    "POST /tools/predict_price", "predict_stock_price" or "tools/call predict_price"."""
+    for ancestor in span.lineage():
+        if endpoint == ancestor.name or endpoint in (ancestor.attributes.get("http.route"),
+                                                     ancestor.attributes.get("url.path")):
+            return True
+        if ancestor.name.endswith(" " + endpoint):
+            return True
+    return False
+
+
+def _collapse(frame) -> str:
+    frames = []
+    while frame is not None and len(frames) < PROFILE_MAX_DEPTH:
+        frames.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+def sample(duration: float = PROFILE_DEFAULT_SECONDS, interval_ms: float = PROFILE_DEFAULT_INTERVAL_MS,
+           endpoint: str = None, all_threads: bool = False) -> dict:
+    """
+    Samples the stacks of this process's threads for `duration` seconds.
+
+    By default only threads inside a traced request, job or tool call are
+    sampled, so idle workers do not drown out the hot path; `endpoint`
+    narrows that to one route or tool, and `all_threads` samples everything.
+    Each stack is rooted at the endpoint it was serving.
+
+    Returns:
+        dict: {"stacks": Counter of collapsed stacks, "samples": int,
+               "ticks": int, "duration": seconds actually sampled}
+    Raises:
+        ProfilerBusy: If another profile is already running in this process.
+    """
+    duration = max(0.0, min(duration, PROFILE_MAX_SECONDS))
+    interval = max(interval_ms, PROFILE_MIN_INTERVAL_MS) / 1000.0
+    if not _active.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker.")
+
+    stacks = Counter()
+    samples = ticks = 0
+    me = threading.get_ident()
+    try:
+        thread_names = {}
+        start = time.perf_counter()
+        deadline = start + duration
+        next_tick = start
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            frames = sys._current_frames()
+            spans = tracing.thread_spans()
+            ticks += 1
+            for thread_id, frame in frames.items():
+                if thread_id == me:
+                    continue
+                span = spans.get(thread_id)
+                if span is None:
+                    if endpoint or not all_threads:
+                        continue
+                    if thread_id not in thread_names:
+                        thread_names = {t.ident: t.name for t in threading.enumerate()}
+                    root = f"thread {thread_names.get(thread_id, thread_id)}"
+                elif _is_request_root(span) and not all_threads:
+                    continue
+                else:
+                    if endpoint and not _matches(span, endpoint):
+                        continue
+                    root = _endpoint_label(span)
+                stacks[f"{root.replace(';', ':')};{_collapse(frame)}"] += 1
+                samples += 1
+            del frames
+            next_tick += interval
+            # Sleep to the next tick; if sampling fell behind, skip ahead rather than burst
+            time.sleep(max(0.0, next_tick - time.perf_counter()))
+            if next_tick < time.perf_counter():
+                next_tick = time.perf_counter()
+        elapsed = time.perf_counter() - start
+    finally:
+        _active.release()
+    return {"stacks": stacks, "samples": samples, "ticks": ticks, "duration": round(elapsed, 3)}
+
+
+def collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's collapsed-stack format (one "frame;frame;frame count" per line),
+    readable by flamegraph.pl, speedscope and inferno."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
@@ -0,0 +1,145 @@
+# tools/render_cache.py
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+
+from tools import metrics
+
+# --- CONFIGURATION ---
+CACHE_DIR = os.path.join("plots", "cache")
+MAX_CACHE_BYTES = int(os.environ.get("PLOT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+logger = logging.getLogger(__name__)
+
+# One lock per cache key so concurrent requests for the same chart render it only once
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+_evict_lock = threading.Lock()
+
+
+def make_cache_key(symbol: str, data_range, last_bar, style, dpi: int) -> str:
+    """
+    Builds a content-addressed key for a rendered chart.
+
+    The key changes whenever anything that affects the output image changes:
+    the symbol, the first/last dates of the plotted data, the last bar's values,
+    the style settings and the output resolution.
+    """
+    payload = json.dumps(
+        {
+            "symbol": symbol.upper(),
+            "range": [str(part) for part in data_range],
+            "last_bar": [str(part) for part in last_bar],
+            "style": style,
+            "dpi": dpi,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cache_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.png")
+
+
+def get_cached(key: str):
+    """Returns the cached file path for a key (and marks it recently used), or None."""
+    path = cache_path(key)
+    try:
+        # Bump the mtime so eviction treats this entry as most recently used
+        os.utime(path, None)
+        return path
+    except FileNotFoundError:
+        return None
+
+
+def put(key: str, data: bytes) -> str:
+    """
+    Atomically stores rendered bytes under the given key.
+
+    The bytes are written to a temporary file in the cache directory and then
+    renamed into place, so readers never see a partially written image.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = cache_path(key)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with metrics.stage("file_write"), os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp creates owner-only files
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    evict(MAX_CACHE_BYTES)
+    return path
+
+
+def get_or_render(key: str, render_fn) -> str:
+    """
+    Returns the cached path for a key, calling render_fn() to produce the PNG
+    bytes on a miss. Concurrent callers with the same key wait for a single render.
+    """
+    path = get_cached(key)
+    metrics.cache_lookup("render", path is not None)
+    if path:
+        return path
+
+    with _key_locks_guard:
+        lock = _key_locks.setdefault(key, threading.Lock())
+
+    with lock:
+        # Another request may have rendered it while we were waiting
+        path = get_cached(key)
+        if path:
+            return path
+        path = put(key, render_fn())
+
+    with _key_locks_guard:
+        _key_locks.pop(key, None)
+    return path
+
+
+def read_bytes(key: str):
+    path = get_cached(key)
+    if path is None:
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def evict(max_bytes: int = MAX_CACHE_BYTES):
+    """Deletes least recently used entries until the cache fits in max_bytes."""
+    with _evict_lock:
+        try:
+            entries = []
+            with os.scandir(CACHE_DIR) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.endswith(".png"):
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+        except FileNotFoundError:
+            return
+
+        total = sum(size for _, size, _ in entries)
+        if total <= max_bytes:
+            return
+
+        entries.sort()  # Oldest mtime first
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        logger.info(f"Evicted chart cache entries; cache size is now {total} bytes.")
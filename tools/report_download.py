@@ -0,0 +1,101 @@
+# tools/report_download.py
+import hashlib
+import io
+import re
+import zlib
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from tools import report_store
+
+# --- CONFIGURATION ---
+DOWNLOAD_BATCH_ROWS = 16384  # Rows encoded per chunk; bounds server memory per download
+GZIP_LEVEL = 6
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_bounds(start=None, end=None):
+    """Validates optional time bounds up front, raising ValueError for unparseable values."""
+    return (pd.Timestamp(start) if start else None, pd.Timestamp(end) if end else None)
+
+
+def download_etag(symbols=None, start=None, end=None, gzip: bool = False, snapshot=None) -> str:
+    """ETag for one filtered download: changes when the data or the filters change."""
+    files, schema = snapshot or report_store.snapshot()
+    key = f"{report_store.version_token(files)}|{schema.names}|{sorted(symbols or [])}|{start}|{end}|{gzip}"
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def iter_report_csv(symbols=None, start=None, end=None, snapshot=None):
+    """
+    Yields the matching reports as CSV bytes, one record batch at a time, so
+    the full report is never held in memory. Pass a report_store.snapshot()
+    to make repeated passes produce identical bytes.
+    """
+    files, schema = snapshot or report_store.snapshot()
+    header_written = False
+    for batch in report_store.scan(symbols, start, end, batch_size=DOWNLOAD_BATCH_ROWS, files=files, schema=schema):
+        buffer = io.BytesIO()
+        pa_csv.write_csv(pa.Table.from_batches([batch]), buffer,
+                         write_options=pa_csv.WriteOptions(include_header=not header_written))
+        header_written = True
+        yield buffer.getvalue()
+    if not header_written:
+        yield (",".join(schema.names) + "\n").encode()
+
+
+def iter_gzip(chunks):
+    """Compresses a byte stream into a gzip stream incrementally."""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def count_bytes(chunks) -> int:
+    return sum(len(chunk) for chunk in chunks)
+
+
+def slice_stream(chunks, first: int, last: int):
+    """Yields only bytes first..last (inclusive) of a byte stream."""
+    position = 0
+    for chunk in chunks:
+        chunk_end = position + len(chunk)
+        if chunk_end > first:
+            yield chunk[max(0, first - position):last + 1 - position]
+        position = chunk_end
+        if position > last:
+            return
+
+
+def parse_range(header: str, total: int):
+    """
+    Parses a single-range 'bytes=' header against a stream of `total` bytes.
+
+    Returns:
+        tuple: (first, last) inclusive, None if the header should be ignored
+               (absent or multi-range), or raises ValueError if unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:  # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, total - length), total - 1
+    first = int(first)
+    last = min(int(last), total - 1) if last else total - 1
+    if first >= total or first > last:
+        raise ValueError("Unsatisfiable range")
+    return first, last
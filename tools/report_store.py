@@ -0,0 +1,327 @@
+# tools/report_store.py
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- CONFIGURATION ---
+REPORTS_DIR = "reports"
+REPORT_DATASET_DIR = os.path.join(REPORTS_DIR, "full_stock_reports")
+SCHEMA_REGISTRY_FILE = os.path.join(REPORT_DATASET_DIR, "_schemas.json")
+SCHEMA_VERSION_KEY = b"report_schema_version"
+# Parts per schema version before compact() merges them into one multi-row-group file
+COMPACT_MIN_PARTS = 16
+COMPACT_INTERVAL_SECONDS = float(os.environ.get("REPORT_COMPACT_INTERVAL", 300))
+# Parts replaced by compaction stay on disk this long, so downloads that took
+# their snapshot before the compaction can still read them
+RETIRED_GRACE_SECONDS = float(os.environ.get("REPORT_RETIRED_GRACE_SECONDS", 3600))
+RETIRED_DIR_NAME = "_retired"  # Compaction manifests, inside the dataset directory
+
+# Columns every report has; prediction_DayN columns follow and depend on the model horizon
+BASE_FIELDS = [
+    pa.field("timestamp", pa.timestamp("s")),
+    pa.field("symbol", pa.string()),
+    pa.field("current_price", pa.float64()),
+]
+
+logger = logging.getLogger(__name__)
+
+
+@contextlib.contextmanager
+def _dataset_lock():
+    os.makedirs(REPORT_DATASET_DIR, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(REPORT_DATASET_DIR, ".lock"), 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _load_registry() -> list:
+    if not os.path.isfile(SCHEMA_REGISTRY_FILE):
+        return []
+    with open(SCHEMA_REGISTRY_FILE, 'r') as f:
+        return json.load(f)
+
+
+def _schema_for(columns) -> pa.Schema:
+    base = {f.name: f for f in BASE_FIELDS}
+    return pa.schema([base.get(name, pa.field(name, pa.float64())) for name in columns])
+
+
+def _resolve_version(columns) -> int:
+    """
+    Returns the schema version for a column list, registering a new version
+    when the columns differ from every known one (e.g. after the forecast
+    horizon changes). Must be called with the dataset lock held.
+    """
+    registry = _load_registry()
+    for entry in registry:
+        if entry["columns"] == columns:
+            return entry["version"]
+
+    version = len(registry) + 1
+    registry.append({"version": version, "columns": columns, "created_at": pd.Timestamp.now().isoformat()})
+    tmp_path = SCHEMA_REGISTRY_FILE + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(registry, f, indent=4)
+    os.replace(tmp_path, SCHEMA_REGISTRY_FILE)
+    return version
+
+
+def _prediction_sort_key(name: str):
+    # 'prediction_Day10' sorts after 'prediction_Day9'
+    digits = "".join(ch for ch in name if ch.isdigit())
+    return int(digits) if digits else 0
+
+
+def _columns_for(keys) -> list:
+    """Base columns first, then prediction columns in horizon order."""
+    base = [f.name for f in BASE_FIELDS]
+    return base + sorted((c for c in keys if c not in base), key=_prediction_sort_key)
+
+
+def _write_part(rows: list, columns: list):
+    df = pd.DataFrame(rows, columns=columns)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+
+    with _dataset_lock():
+        version = _resolve_version(columns)
+
+    schema = _schema_for(columns).with_metadata({SCHEMA_VERSION_KEY: str(version).encode()})
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+    name = f"part-v{version}-{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+    tmp_path = os.path.join(REPORT_DATASET_DIR, f".{name}.tmp")
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, os.path.join(REPORT_DATASET_DIR, name))
+
+
+def append(rows) -> str:
+    """
+    Appends report rows as Parquet part files (a single row group each) tagged
+    with their schema version, and returns the dataset directory.
+
+    Rows may come from different forecast horizons: rows are grouped by their
+    column set and each group is written as its own part under its own schema
+    version, so columns never shift under an old header.
+    """
+    by_columns = {}
+    for row in rows:
+        by_columns.setdefault(tuple(_columns_for(row)), []).append(row)
+    for columns, group in by_columns.items():
+        _write_part(group, list(columns))
+    return REPORT_DATASET_DIR
+
+
+def _retirements() -> list:
+    """
+    (manifest path, retired_at, replaced part names) for each compaction. A
+    manifest is written before its merged file is renamed into place and only
+    counts once that file exists, so the rename is the single moment the old
+    parts leave the dataset.
+    """
+    retired_dir = os.path.join(REPORT_DATASET_DIR, RETIRED_DIR_NAME)
+    if not os.path.isdir(retired_dir):
+        return []
+    entries = []
+    for name in sorted(os.listdir(retired_dir)):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(retired_dir, name)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        live = os.path.isfile(os.path.join(REPORT_DATASET_DIR, entry["compacted"]))
+        entries.append((path, entry["retired_at"], entry["replaces"] if live else []))
+    return entries
+
+
+def _data_files():
+    if not os.path.isdir(REPORT_DATASET_DIR):
+        return []
+    retired = {name for _, _, replaces in _retirements() for name in replaces}
+    return sorted(
+        os.path.join(REPORT_DATASET_DIR, name) for name in os.listdir(REPORT_DATASET_DIR)
+        if name.endswith(".parquet") and not name.startswith(".") and name not in retired
+    )
+
+
+def snapshot() -> tuple:
+    """
+    (part files, unified schema) as of now. Passing both to scan() lets
+    several passes over the dataset read exactly the same data, even while
+    new parts are appended.
+    """
+    files = _data_files()
+    return files, unified_schema()
+
+
+def version_token(files=None) -> str:
+    """Changes whenever a part file is added or compacted; part files are immutable."""
+    names = "\n".join(os.path.basename(path) for path in (_data_files() if files is None else files))
+    return hashlib.sha256(names.encode("utf-8")).hexdigest()
+
+
+def unified_schema() -> pa.Schema:
+    """Union of every registered schema version, in the order columns first appeared."""
+    columns = []
+    for entry in _load_registry():
+        columns.extend(c for c in entry["columns"] if c not in columns)
+    base = [f.name for f in BASE_FIELDS]
+    return _schema_for(base + sorted((c for c in columns if c not in base), key=_prediction_sort_key))
+
+
+def _filter_expression(symbols=None, start=None, end=None):
+    expression = None
+    conditions = []
+    if symbols:
+        conditions.append(ds.field("symbol").isin([s.upper() for s in symbols]))
+    if start is not None:
+        conditions.append(ds.field("timestamp") >= pa.scalar(pd.Timestamp(start).to_pydatetime(), pa.timestamp("s")))
+    if end is not None:
+        conditions.append(ds.field("timestamp") <= pa.scalar(pd.Timestamp(end).to_pydatetime(), pa.timestamp("s")))
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def scan(symbols=None, start=None, end=None, columns=None, batch_size: int = 65536, files=None, schema=None):
+    """
+    Yields record batches of reports across every schema version, with
+    predicate pushdown on symbol and time. Columns missing from older
+    versions come back as nulls. `files` and `schema` default to the current
+    snapshot().
+    """
+    if files is None:
+        files = _data_files()
+    if not files:
+        return
+    dataset = ds.dataset(files, schema=schema or unified_schema(), format="parquet")
+    yield from dataset.to_batches(columns=columns, filter=_filter_expression(symbols, start, end), batch_size=batch_size)
+
+
+def read_reports(symbols=None, start=None, end=None, columns=None) -> pd.DataFrame:
+    """Reads matching reports into a DataFrame sorted by time."""
+    batches = list(scan(symbols, start, end, columns))
+    if not batches:
+        return unified_schema().empty_table().to_pandas()
+    df = pa.Table.from_batches(batches).to_pandas()
+    return df.sort_values("timestamp", ignore_index=True) if "timestamp" in df.columns else df
+
+
+def compact() -> int:
+    """
+    Merges small part files of each schema version into one file, keeping each
+    original part as its own row group. Returns the number of versions compacted.
+    The server runs it on a schedule (Compactor); python -m tools.report_store
+    runs it once.
+
+    Replaced parts leave the dataset at once but are only deleted after
+    RETIRED_GRACE_SECONDS, so in-flight snapshots keep reading them.
+    """
+    compacted = 0
+    with _dataset_lock():
+        _delete_retired()
+        by_version = {}
+        for path in _data_files():
+            version = os.path.basename(path).split("-")[1]
+            by_version.setdefault(version, []).append(path)
+
+        for version, paths in by_version.items():
+            if len(paths) < COMPACT_MIN_PARTS:
+                continue
+            schema = pq.read_schema(paths[0])
+            name = f"part-{version}-{time.time_ns()}-{os.getpid()}-compacted.parquet"
+            tmp_path = os.path.join(REPORT_DATASET_DIR, f".{name}.tmp")
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for path in paths:
+                    writer.write_table(pq.read_table(path, schema=schema))
+            retired_dir = os.path.join(REPORT_DATASET_DIR, RETIRED_DIR_NAME)
+            os.makedirs(retired_dir, exist_ok=True)
+            manifest = os.path.join(retired_dir, f"{name}.json")
+            with open(manifest + ".tmp", 'w') as f:
+                json.dump({"compacted": name, "retired_at": time.time(),
+                           "replaces": [os.path.basename(path) for path in paths]}, f)
+            os.replace(manifest + ".tmp", manifest)
+            os.replace(tmp_path, os.path.join(REPORT_DATASET_DIR, name))
+            compacted += 1
+    return compacted
+
+
+def _delete_retired(now: float = None):
+    """Deletes retired parts past the grace period. Must be called with the dataset lock held."""
+    now = time.time() if now is None else now
+    for manifest, retired_at, replaces in _retirements():
+        if now - retired_at < RETIRED_GRACE_SECONDS:
+            continue
+        for name in replaces:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(REPORT_DATASET_DIR, name))
+        os.remove(manifest)
+
+
+class Compactor:
+    """Runs compact() every COMPACT_INTERVAL_SECONDS on a background thread."""
+
+    def __init__(self, interval: float = COMPACT_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                count = compact()
+            except Exception as e:
+                logger.error(f"Report compaction failed: {e}")
+                continue
+            if count:
+                logger.info(f"Compacted {count} report schema versions.")
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="report-store-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+def import_csv(csv_path: str) -> int:
+    """Loads a legacy full_stock_reports.csv into the dataset (one schema version per header)."""
+    df = pd.read_csv(csv_path)
+    append(df.to_dict(orient="records"))
+    return len(df)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) == 3 and sys.argv[1] == "--import-csv":
+        print(f"Imported {import_csv(sys.argv[2])} reports into {REPORT_DATASET_DIR}")
+    else:
+        print(f"Compacted {compact()} schema versions in {REPORT_DATASET_DIR}")
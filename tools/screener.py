@@ -0,0 +1,191 @@
+# tools/screener.py
+import logging
+import operator
+import os
+import threading
+
+import pandas as pd
+import yfinance as yf
+
+from tools import indicator_store, metrics, profile_store
+from tools.predict_price import calculate_technical_indicators
+from tools.tracing import traced
+
+# --- CONFIGURATION ---
+SCREEN_MAX_LIMIT = 1000
+INDICATOR_PERIOD = "6mo"  # Enough daily bars for SMA_20, RSI and a settled MACD
+INDICATOR_CHUNK_SIZE = int(os.environ.get("INDICATOR_CHUNK_SIZE", 100))
+PROFILE_COLUMNS = ["shortName", "sector", "industry"]
+# Cached yfinance keys -> the field names get_stock_summary returns
+FIELD_NAMES = {
+    "shortName": "company_name",
+    "sector": "sector",
+    "industry": "industry",
+    "marketCap": "market_cap",
+    "trailingPE": "pe_ratio",
+    "trailingPegRatio": "peg_ratio",
+    "beta": "beta",
+    "fiftyTwoWeekHigh": "52_week_high",
+    "fiftyTwoWeekLow": "52_week_low",
+}
+TEXT_COLUMNS = ["company_name", "sector", "industry", "indicators_as_of"]
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "in": lambda column, value: column.isin(value),
+    "between": lambda column, value: column.between(value[0], value[1]),
+}
+
+logger = logging.getLogger(__name__)
+
+_universe = {"version": None, "frame": None}
+_universe_lock = threading.Lock()
+
+
+def _build_universe() -> pd.DataFrame:
+    """Joins cached fundamentals, profile text and latest indicators into one table indexed by symbol."""
+    fundamentals = pd.DataFrame.from_dict(profile_store.load_group("fundamentals"), orient="index")
+    fundamentals = fundamentals.reindex(columns=profile_store.FIELD_GROUPS["fundamentals"])
+    profile = pd.DataFrame.from_dict(profile_store.load_group("profile"), orient="index")
+    profile = profile.reindex(columns=PROFILE_COLUMNS)
+    indicators = indicator_store.load_all()
+
+    frame = fundamentals.join(profile, how="outer").join(indicators, how="outer").rename(columns=FIELD_NAMES)
+    for column in frame.columns:
+        if column not in TEXT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    frame.index.name = "symbol"
+    return frame.sort_index()
+
+
+def get_universe() -> pd.DataFrame:
+    """
+    Returns the in-memory screening table, rebuilding it only when either
+    store has changed since the last build.
+    """
+    version = (profile_store.version(), indicator_store.version())
+    with _universe_lock:
+        metrics.cache_lookup("screener_universe", _universe["version"] == version)
+        if _universe["version"] != version:
+            _universe["frame"] = _build_universe()
+            _universe["version"] = version
+        return _universe["frame"]
+
+
+def filter_mask(frame: pd.DataFrame, filters):
+    """ANDs the filters into one boolean row mask; returns (mask, None) or (None, error dict)."""
+    columns = set(frame.columns)
+    mask = pd.Series(True, index=frame.index)
+    for condition in filters or []:
+        field, op, value = condition.get("field"), condition.get("op"), condition.get("value")
+        if field not in columns:
+            return None, {"error": f"Unknown screen field '{field}'. Valid fields: {', '.join(sorted(columns))}."}
+        if op not in OPERATORS:
+            return None, {"error": f"Unknown operator '{op}'. Valid operators: {', '.join(OPERATORS)}."}
+        if op == "between" and (not isinstance(value, (list, tuple)) or len(value) != 2):
+            return None, {"error": "'between' needs a [low, high] value."}
+        if op == "in" and not isinstance(value, (list, tuple)):
+            return None, {"error": "'in' needs a list value."}
+        try:
+            column = frame[field]
+            # NaN != x is True, so mask out missing values explicitly
+            mask &= OPERATORS[op](column, value).fillna(False).astype(bool) & column.notna()
+        except TypeError as e:
+            return None, {"error": f"Cannot compare '{field}' with {value!r}: {str(e)}"}
+    return mask, None
+
+
+@traced(args=("sort_by", "limit", "offset"))
+def screen(filters=None, sort_by: str = None, descending: bool = False,
+           limit: int = 50, offset: int = 0, fields=None) -> dict:
+    """
+    Screens every cached symbol with vectorized filters, e.g.
+    [{"field": "RSI", "op": "<", "value": 30}, {"field": "pe_ratio", "op": "<", "value": 15}].
+    Filters are ANDed; rows missing a filtered value never match.
+
+    Returns:
+        dict: The total match count and one sorted, paginated page of rows,
+              or an error message for an invalid screen.
+    """
+    frame = get_universe()
+    columns = set(frame.columns)
+
+    mask, error = filter_mask(frame, filters)
+    if error:
+        return error
+
+    if sort_by is not None and sort_by not in columns and sort_by != "symbol":
+        return {"error": f"Unknown sort field '{sort_by}'."}
+    if fields:
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            return {"error": f"Unknown screen fields: {', '.join(unknown)}."}
+
+    matches = frame[mask]
+    if sort_by == "symbol":
+        matches = matches.sort_index(ascending=not descending)
+    elif sort_by:
+        matches = matches.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+
+    limit = max(0, min(limit, SCREEN_MAX_LIMIT))
+    offset = max(0, offset)
+    page = matches.iloc[offset:offset + limit]
+    if fields:
+        page = page[list(fields)]
+    page = page.astype(object).where(page.notna(), None).reset_index()
+
+    return {
+        "total": len(matches),
+        "universe": len(frame),
+        "offset": offset,
+        "limit": limit,
+        "results": page.to_dict(orient="records"),
+    }
+
+
+def refresh_indicators(symbols, job=None) -> dict:
+    """Downloads daily history in bulk and records the latest indicators of every symbol."""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    recorded = 0
+    errors = {}
+    if job is not None:
+        job.update_progress(done=0, total=len(symbols))
+    for start in range(0, len(symbols), INDICATOR_CHUNK_SIZE):
+        if job is not None:
+            job.check_cancelled()
+        chunk = symbols[start:start + INDICATOR_CHUNK_SIZE]
+        try:
+            with metrics.stage("upstream_fetch", call="download", symbols=len(chunk), period=INDICATOR_PERIOD):
+                data = yf.download(chunk, period=INDICATOR_PERIOD, interval="1d", group_by="ticker",
+                               threads=True, progress=False)
+        except Exception as e:
+            logger.error(f"Indicator download failed for {len(chunk)} symbols: {e}")
+            data = pd.DataFrame()
+
+        rows = []
+        for symbol in chunk:
+            if data.empty:
+                history = data
+            elif isinstance(data.columns, pd.MultiIndex):
+                history = data[symbol].dropna(how="all") if symbol in data.columns.get_level_values(0) else pd.DataFrame()
+            else:
+                history = data
+            if history.empty:
+                errors[symbol] = f"No data found for '{symbol}'."
+                continue
+            with metrics.stage("indicators"):
+                indicators = calculate_technical_indicators(history)
+            as_of, values = indicator_store.latest_row(indicators)
+            rows.append((symbol, as_of, values))
+        if rows:
+            indicator_store.put_many(rows)
+            recorded += len(rows)
+        if job is not None:
+            job.update_progress(done=min(start + len(chunk), len(symbols)))
+
+    return {"requested": len(symbols), "recorded": recorded, "errors": errors}
@@ -0,0 +1,194 @@
+# tools/tick_log.py
+import contextlib
+import json
+import os
+import threading
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# --- CONFIGURATION ---
+TICK_DIR = os.path.join("logs", "ticks")
+SYMBOL_TABLE_FILE = os.path.join(TICK_DIR, "symbols.json")
+
+# Fixed-width 20-byte little-endian record: UTC epoch nanoseconds, interned symbol id, price.
+# Day files cover UTC days.
+TICK_DTYPE = np.dtype([("ts_ns", "<i8"), ("symbol_id", "<i4"), ("price", "<f8")])
+
+
+@contextlib.contextmanager
+def _file_lock(path: str):
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class SymbolTable:
+    """
+    Append-only mapping between ticker symbols and the int32 ids stored in tick
+    records. Ids are never reused, so any tick file can be decoded with the
+    current table. Shared between processes through a locked JSON file.
+    """
+
+    def __init__(self, path: str = SYMBOL_TABLE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._symbols = []
+        self._ids = {}
+        self._reload()
+
+    def _reload(self):
+        if os.path.isfile(self.path):
+            with open(self.path, 'r') as f:
+                self._symbols = json.load(f)
+            self._ids = {symbol: i for i, symbol in enumerate(self._symbols)}
+
+    def ids(self, symbols) -> np.ndarray:
+        """Returns the id for each symbol, interning any that are new."""
+        symbols = [s.upper() for s in symbols]
+        with self._lock:
+            if any(s not in self._ids for s in symbols):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with _file_lock(self.path):
+                    # Another process may have interned symbols since we last looked
+                    self._reload()
+                    new = [s for s in dict.fromkeys(symbols) if s not in self._ids]
+                    if new:
+                        for s in new:
+                            self._ids[s] = len(self._symbols)
+                            self._symbols.append(s)
+                        tmp_path = self.path + ".tmp"
+                        with open(tmp_path, 'w') as f:
+                            json.dump(self._symbols, f)
+                        os.replace(tmp_path, self.path)
+            return np.fromiter((self._ids[s] for s in symbols), dtype=np.int32, count=len(symbols))
+
+    def id(self, symbol: str):
+        with self._lock:
+            if symbol.upper() not in self._ids:
+                self._reload()
+            return self._ids.get(symbol.upper())
+
+    def names(self) -> np.ndarray:
+        """Array of symbols indexed by id, for vectorized decoding (names()[ticks["symbol_id"]])."""
+        with self._lock:
+            self._reload()
+            return np.array(self._symbols, dtype=object)
+
+
+_symbol_table = None
+_symbol_table_lock = threading.Lock()
+
+
+def get_symbol_table() -> SymbolTable:
+    global _symbol_table
+    with _symbol_table_lock:
+        if _symbol_table is None:
+            _symbol_table = SymbolTable()
+        return _symbol_table
+
+
+def day_path(date: str) -> str:
+    return os.path.join(TICK_DIR, f"ticks-{date}.bin")
+
+
+def _utc_ns(timestamp) -> int:
+    """Epoch nanoseconds of a timestamp; naive ones (as the price log writes them) are local time."""
+    import pandas as pd
+
+    ts = pd.Timestamp(timestamp)
+    if ts.tzinfo is None:
+        # The local UTC offset at that moment, so daylight saving time is respected
+        ts = ts.tz_localize(ts.to_pydatetime().astimezone().tzinfo)
+    return ts.value
+
+
+def encode(rows) -> np.ndarray:
+    """Converts (timestamp, symbol, price) rows into a TICK_DTYPE array."""
+    timestamps, symbols, prices = zip(*rows)
+    ticks = np.empty(len(rows), dtype=TICK_DTYPE)
+    ticks["ts_ns"] = np.fromiter((_utc_ns(t) for t in timestamps), dtype=np.int64, count=len(rows))
+    ticks["symbol_id"] = get_symbol_table().ids(symbols)
+    ticks["price"] = np.asarray(prices, dtype=np.float64)
+    return ticks
+
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def append(rows) -> int:
+    """
+    Appends rows to the per-day tick files, one locked write per day followed
+    by fsync. A partial record left at the end of a file (by a crash
+    mid-write) is truncated first, so new records always start on a record
+    boundary.
+    """
+    if not rows:
+        return 0
+    ticks = encode(rows)
+    days = ticks["ts_ns"].astype("datetime64[ns]").astype("datetime64[D]")
+    os.makedirs(TICK_DIR, exist_ok=True)
+    for day in np.unique(days):
+        batch = ticks[days == day]
+        path = day_path(str(day))
+        with _file_lock(path):
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                size = os.fstat(fd).st_size
+                if size % TICK_DTYPE.itemsize:
+                    os.ftruncate(fd, size - size % TICK_DTYPE.itemsize)
+                _write_all(fd, batch.tobytes())
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    return len(ticks)
+
+
+def read_day(date: str) -> np.ndarray:
+    """
+    Memory-maps one (UTC) day of ticks as a read-only structured array. No data is
+    copied until it is touched; a trailing partial record (from a crash
+    mid-write) is ignored here and truncated by the next append().
+    """
+    path = day_path(date)
+    if not os.path.isfile(path):
+        return np.empty(0, dtype=TICK_DTYPE)
+    count = os.path.getsize(path) // TICK_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=TICK_DTYPE)
+    return np.memmap(path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+
+def replay(date: str, symbols=None) -> np.ndarray:
+    """Returns a day's ticks, optionally limited to some symbols."""
+    ticks = read_day(date)
+    if not symbols or len(ticks) == 0:
+        return ticks
+    table = get_symbol_table()
+    ids = [i for i in (table.id(s) for s in symbols) if i is not None]
+    return ticks[np.isin(ticks["symbol_id"], ids)]
+
+
+def to_frame(ticks):
+    """Decodes ticks into a pandas DataFrame (copies; use for presentation, not bulk replay)."""
+    import pandas as pd
+
+    return pd.DataFrame({
+        "timestamp": pd.to_datetime(ticks["ts_ns"], unit="ns", utc=True),
+        "symbol": get_symbol_table().names()[ticks["symbol_id"]],
+        "price": ticks["price"],
+    })
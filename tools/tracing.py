@@ -0,0 +1,311 @@
+# tools/tracing.py
+import atexit
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+
+# --- CONFIGURATION ---
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join("logs", "traces.jsonl"))
+# Optional OTLP/HTTP JSON collector, e.g. http://localhost:4318/v1/traces
+TRACE_EXPORT_URL = os.environ.get("TRACE_EXPORT_URL")
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", 1.0))  # Fraction of new request traces exported
+# Traces started outside a request (watchlist poller, profile refresher, ...) are not exported by default
+TRACE_BACKGROUND_SAMPLE_RATE = float(os.environ.get("TRACE_BACKGROUND_SAMPLE_RATE", 0.0))
+# TRACE_FILE rolls over to TRACE_FILE.1 .. TRACE_FILE.<backups> past this size; older files are deleted
+TRACE_FILE_MAX_BYTES = int(os.environ.get("TRACE_FILE_MAX_BYTES", 50 * 1024 * 1024))
+TRACE_FILE_BACKUPS = int(os.environ.get("TRACE_FILE_BACKUPS", 3))
+TRACE_SERVICE_NAME = os.environ.get("TRACE_SERVICE_NAME", "stock-market-tools")
+EXPORT_BATCH_SIZE = 512
+EXPORT_INTERVAL_SECONDS = 2.0
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+# Innermost open span per thread, for tools that inspect other threads (the sampling profiler)
+_thread_spans = {}
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_id: str = None, sampled: bool = True,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: dict = None, parent: "Span" = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.parent = parent  # In-process parent; None for roots and remote parents
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_OK
+        self.status_message = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.status = STATUS_ERROR
+        self.status_message = str(error)
+
+    @property
+    def ended(self) -> bool:
+        return self.end_ns is not None
+
+    def lineage(self) -> list:
+        """This span and its in-process ancestors, root first."""
+        chain = []
+        span = self
+        while span is not None:
+            chain.append(span)
+            span = span.parent
+        return chain[::-1]
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _Exporter:
+    """Batches finished spans and writes them as OTLP JSON lines (and to a collector if configured)."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        self._queue.put(span)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _drain(self) -> list:
+        spans = []
+        while len(spans) < EXPORT_BATCH_SIZE:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def flush(self):
+        while True:
+            spans = self._drain()
+            if not spans:
+                return
+            self._write(spans)
+
+    def _run(self):
+        while True:
+            time.sleep(EXPORT_INTERVAL_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    def _write(self, spans):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}},
+                                            {"key": "process.pid", "value": {"intValue": str(os.getpid())}}]},
+                "scopeSpans": [{"scope": {"name": "tools.tracing"}, "spans": [span.to_otlp() for span in spans]}],
+            }]
+        }
+        line = json.dumps(payload, separators=(",", ":"))
+        os.makedirs(os.path.dirname(TRACE_FILE) or ".", exist_ok=True)
+        self._rotate(len(line) + 1)
+        # One write per batch in append mode, so lines from several workers never interleave
+        with open(TRACE_FILE, "a") as f:
+            f.write(line + "\n")
+        if TRACE_EXPORT_URL:
+            import requests
+            requests.post(TRACE_EXPORT_URL, data=line, headers={"Content-Type": "application/json"}, timeout=5)
+
+    def _rotate(self, incoming: int):
+        """Shifts TRACE_FILE to TRACE_FILE.1 (and so on) when the next batch would take it past the limit."""
+        try:
+            size = os.path.getsize(TRACE_FILE)
+        except OSError:
+            return
+        if size == 0 or size + incoming <= TRACE_FILE_MAX_BYTES:
+            return
+        # Workers that rotate at the same moment can only shift the files one extra step
+        for index in range(TRACE_FILE_BACKUPS - 1, 0, -1):
+            with contextlib.suppress(FileNotFoundError):
+                os.replace(f"{TRACE_FILE}.{index}", f"{TRACE_FILE}.{index + 1}")
+        with contextlib.suppress(FileNotFoundError):
+            if TRACE_FILE_BACKUPS > 0:
+                os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+            else:
+                os.remove(TRACE_FILE)
+
+
+_exporter = _Exporter()
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+def thread_spans() -> dict:
+    """{thread id: innermost open span} for threads currently inside a span."""
+    return {tid: span for tid, span in list(_thread_spans.items()) if not span.ended}
+
+
+def parse_traceparent(header: str):
+    """Returns (trace_id, parent_span_id, sampled) from a W3C traceparent header, or None."""
+    match = _TRACEPARENT_RE.match((header or "").strip().lower())
+    if not match or match.group(1) == "0" * 32:
+        return None
+    return match.group(1), match.group(2), int(match.group(3), 16) & 1 == 1
+
+
+@contextlib.contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, traceparent: str = None, **attributes):
+    """
+    Opens a span as a child of the current one (or starts a new trace, or
+    continues an incoming W3C traceparent). Exceptions mark the span as failed.
+    New traces are sampled at TRACE_SAMPLE_RATE when they start at a request
+    (a SERVER span) and at TRACE_BACKGROUND_SAMPLE_RATE otherwise.
+    """
+    parent = _current_span.get()
+    remote = parse_traceparent(traceparent) if parent is None and traceparent else None
+    if parent is not None:
+        new = Span(name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes, parent)
+    elif remote is not None:
+        new = Span(name, remote[0], remote[1], remote[2], kind, attributes)
+    else:
+        rate = TRACE_SAMPLE_RATE if kind == SPAN_KIND_SERVER else TRACE_BACKGROUND_SAMPLE_RATE
+        new = Span(name, f"{random.getrandbits(128):032x}", None, random.random() < rate, kind, attributes)
+
+    token = _current_span.set(new)
+    thread_id = threading.get_ident()
+    outer = _thread_spans.get(thread_id)
+    _thread_spans[thread_id] = new
+    try:
+        yield new
+    except BaseException as e:
+        new.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        new.end_ns = time.time_ns()
+        # Async spans interleave on the event loop thread, so this can restore
+        # a span that has already ended; thread_spans() skips those
+        if outer is None:
+            _thread_spans.pop(thread_id, None)
+        else:
+            _thread_spans[thread_id] = outer
+        if new.sampled:
+            _exporter.export(new)
+
+
+def traced(name: str = None, args=("symbol",)):
+    """
+    Decorator: runs the function inside a span named after it, recording the
+    named arguments (when they are plain values) as span attributes. The tools
+    report failures as {"error": ...} rather than raising, so those mark the
+    span as failed too.
+    """
+    def decorator(fn):
+        span_name = name or fn.__name__
+        signature = inspect.signature(fn)
+        recorded = [arg for arg in args if arg in signature.parameters]
+
+        @functools.wraps(fn)
+        def wrapper(*call_args, **kwargs):
+            attributes = {}
+            if recorded:
+                bound = signature.bind_partial(*call_args, **kwargs).arguments
+                attributes = {arg: bound[arg] for arg in recorded
+                              if isinstance(bound.get(arg), (str, int, float, bool))}
+            with span(span_name, **attributes) as current:
+                result = fn(*call_args, **kwargs)
+                if isinstance(result, dict) and result.get("error"):
+                    current.record_error(result["error"])
+                return result
+        return wrapper
+    return decorator
+
+
+def in_context(fn):
+    """
+    Binds fn to the caller's context, so spans opened in a worker thread join
+    the caller's trace. Each call runs in its own copy, so the wrapped function
+    can be mapped over a thread pool.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def flush():
+    _exporter.flush()
+
+
+# --- Logging: every record carries the current trace id ---
+_base_record_factory = logging.getLogRecordFactory()
+
+
+def _record_factory(*args, **kwargs):
+    record = _base_record_factory(*args, **kwargs)
+    record.trace_id = current_trace_id() or "-"
+    return record
+
+
+logging.setLogRecordFactory(_record_factory)
@@ -0,0 +1,155 @@
+# tools/watchlist_poller.py
+from datetime import datetime
+import logging
+import os
+import random
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+import pandas as pd
+import yfinance as yf
+
+from tools import metrics
+from tools.price_log_writer import get_writer
+from tools.watchlists import DEFAULT_WATCHLIST, get_watchlist
+
+# --- CONFIGURATION ---
+POLL_WATCHLIST = os.environ.get("POLL_WATCHLIST", DEFAULT_WATCHLIST)
+POLL_INTERVAL_SECONDS = float(os.environ.get("POLL_INTERVAL_SECONDS", 60))
+POLL_JITTER_SECONDS = float(os.environ.get("POLL_JITTER_SECONDS", 5))
+POLL_MAX_BACKOFF_SECONDS = float(os.environ.get("POLL_MAX_BACKOFF_SECONDS", 900))
+# yfinance builds one request URL per chunk, so very large watchlists are split
+POLL_CHUNK_SIZE = int(os.environ.get("POLL_CHUNK_SIZE", 500))
+# Only the worker process holding this lock polls, so multi-worker servers don't log duplicates
+POLL_LOCK_FILE = os.path.join("logs", ".watchlist_poller.lock")
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_latest_prices(symbols) -> pd.Series:
+    """
+    Fetches the latest traded price for many symbols with bulk downloads.
+
+    Returns:
+        pd.Series: Latest price indexed by upper-case symbol. Symbols without
+                   data are left out.
+    """
+    symbols = [s.upper() for s in symbols]
+    latest = []
+    for start in range(0, len(symbols), POLL_CHUNK_SIZE):
+        chunk = symbols[start:start + POLL_CHUNK_SIZE]
+        with metrics.stage("upstream_fetch", call="download", symbols=len(chunk), period="1d", interval="1m"):
+            data = yf.download(chunk, period="1d", interval="1m", progress=False, threads=True)
+        if data.empty:
+            continue
+        close = data["Close"]
+        if isinstance(close, pd.Series):
+            close = close.to_frame(chunk[0])
+        # Last non-missing bar per column, computed for the whole chunk at once
+        latest.append(close.ffill().iloc[-1].dropna())
+
+    if not latest:
+        return pd.Series(dtype="float64")
+    return pd.concat(latest).round(2)
+
+
+class WatchlistPoller:
+    """
+    Polls a named watchlist on a fixed cadence and appends every price to the
+    price log through the batched writer.
+
+    Each cycle adds random jitter to the interval so several servers don't hit
+    the provider in lockstep, and failed cycles back off exponentially.
+    """
+
+    def __init__(self, watchlist: str = POLL_WATCHLIST, interval: float = POLL_INTERVAL_SECONDS,
+                 jitter: float = POLL_JITTER_SECONDS, max_backoff: float = POLL_MAX_BACKOFF_SECONDS):
+        self.watchlist = watchlist
+        self.interval = interval
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_poll = None
+        self.last_count = 0
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+
+    def _is_leader(self) -> bool:
+        if fcntl is None or self._lock_file is not None:
+            return True
+        os.makedirs(os.path.dirname(POLL_LOCK_FILE), exist_ok=True)
+        lock_file = open(POLL_LOCK_FILE, 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file  # Held for the life of the process
+        return True
+
+    def poll_once(self) -> int:
+        symbols = get_watchlist(self.watchlist)
+        if not symbols:
+            return 0
+
+        prices = fetch_latest_prices(symbols)
+        timestamp = datetime.now().isoformat()
+        get_writer().add_many([(timestamp, symbol, price) for symbol, price in prices.items()])
+
+        self.last_poll = timestamp
+        self.last_count = len(prices)
+        return len(prices)
+
+    def _next_delay(self) -> float:
+        if self.failures:
+            delay = min(self.max_backoff, self.interval * (2 ** self.failures))
+        else:
+            delay = self.interval
+        return delay + random.uniform(0, self.jitter)
+
+    def _run(self):
+        # Start with a jittered delay too, so restarts don't all poll at once
+        delay = random.uniform(0, self.jitter)
+        while not self._stop.wait(delay):
+            if not self._is_leader():
+                delay = self._next_delay()
+                continue
+            try:
+                count = self.poll_once()
+                self.failures = 0
+                self.last_error = None
+                logger.info(f"Polled {count} prices from watchlist '{self.watchlist}'.")
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.error(f"Watchlist poll failed ({self.failures} in a row): {e}")
+            delay = self._next_delay()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="watchlist-poller", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def status(self) -> dict:
+        return {
+            "watchlist": self.watchlist,
+            "running": self._thread is not None and self._thread.is_alive(),
+            "leader": self._lock_file is not None,
+            "interval_seconds": self.interval,
+            "last_poll": self.last_poll,
+            "last_count": self.last_count,
+            "consecutive_failures": self.failures,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,42 @@
+# tools/watchlists.py
+import json
+import os
+import tempfile
+import threading
+
+# --- CONFIGURATION ---
+WATCHLISTS_FILE = os.environ.get("WATCHLISTS_FILE", "watchlists.json")
+DEFAULT_WATCHLIST = "default"
+
+_lock = threading.Lock()
+
+
+def load_watchlists() -> dict:
+    """Returns every named watchlist as {name: [symbols]}."""
+    with _lock:
+        if not os.path.isfile(WATCHLISTS_FILE):
+            return {}
+        with open(WATCHLISTS_FILE, 'r') as f:
+            return json.load(f)
+
+
+def get_watchlist(name: str = DEFAULT_WATCHLIST) -> list:
+    return load_watchlists().get(name, [])
+
+
+def save_watchlist(name: str, symbols) -> list:
+    """Replaces the symbols in a named watchlist (upper-cased, de-duplicated, order kept)."""
+    symbols = list(dict.fromkeys(s.strip().upper() for s in symbols if s.strip()))
+    with _lock:
+        watchlists = {}
+        if os.path.isfile(WATCHLISTS_FILE):
+            with open(WATCHLISTS_FILE, 'r') as f:
+                watchlists = json.load(f)
+        watchlists[name] = symbols
+
+        directory = os.path.dirname(os.path.abspath(WATCHLISTS_FILE))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'w') as f:
+            json.dump(watchlists, f, indent=4)
+        os.replace(tmp_path, WATCHLISTS_FILE)
+    return symbols
@@ -3,14 +3,24 @@ import numpy as np
 import pandas as pd
 import yfinance as yf
 from sklearn.preprocessing import MinMaxScaler
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+from tensorflow.keras.callbacks import Callback, EarlyStopping, ReduceLROnPlateau
+import contextlib
+from datetime import datetime, timezone
 import joblib
 import os
 import json
+import platform
+import sys
 import time
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 # --- CONFIGURATION ---
 MODELS_DIR = "models"
 MODEL_NAME = "lstm_stock_predictor.keras"
@@ -18,6 +28,50 @@ SCALER_NAME = "scaler.pkl"
 METADATA_NAME = "model_metadata.json"
 N_STEPS_AHEAD = 5
 LOOKBACK = 60
+EPOCHS = 100
+BATCH_SIZE = 32
+VALIDATION_SPLIT = 0.1
+BENCHMARK_EPOCHS = 5
+
+@contextlib.contextmanager
+def timed(report, stage):
+    """Records the wall time of a block under report["stages"][stage] when benchmarking."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if report is not None:
+            report["stages"][stage] = round(time.perf_counter() - start, 4)
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+class EpochThroughput(Callback):
+    """Times every epoch and records its training samples per second and losses."""
+
+    def __init__(self, train_samples):
+        super().__init__()
+        self.train_samples = train_samples
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._start
+        logs = logs or {}
+        self.epochs.append({
+            "epoch": epoch + 1,
+            "seconds": round(seconds, 4),
+            "samples_per_second": round(self.train_samples / seconds, 1) if seconds else None,
+            "loss": float(logs["loss"]) if "loss" in logs else None,
+            "val_loss": float(logs["val_loss"]) if "val_loss" in logs else None,
+        })
 
 def get_stock_data(symbol, period="10y", retries=3, delay=5):
     """Fetches stock data and flattens columns if they are a MultiIndex."""
@@ -61,19 +115,22 @@ def calculate_technical_indicators(df):
     df_calc.dropna(inplace=True)
     return df_calc
 
-def prepare_data(df, lookback, n_steps_ahead):
+def prepare_data(df, lookback, n_steps_ahead, report=None):
     """Prepares data for LSTM, creating sequences for multi-step prediction."""
     scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(df)
+    with timed(report, "scaler_fit_transform"):
+        scaled_data = scaler.fit_transform(df)
     
     close_column_index = df.columns.get_loc('Close')
     
-    X, y = [], []
-    for i in range(lookback, len(scaled_data) - n_steps_ahead + 1):
-        X.append(scaled_data[i - lookback:i, :])
-        y.append(scaled_data[i:i + n_steps_ahead, close_column_index])
+    with timed(report, "prepare_data"):
+        X, y = [], []
+        for i in range(lookback, len(scaled_data) - n_steps_ahead + 1):
+            X.append(scaled_data[i - lookback:i, :])
+            y.append(scaled_data[i:i + n_steps_ahead, close_column_index])
+        X, y = np.array(X), np.array(y)
 
-    return np.array(X), np.array(y), scaler
+    return X, y, scaler
 
 def build_model(input_shape, n_steps_ahead):
     """Builds the LSTM model for multi-step prediction."""
@@ -88,64 +145,180 @@ def build_model(input_shape, n_steps_ahead):
     model.compile(optimizer="adam", loss="mean_squared_error")
     return model
 
-def train_and_save_model(symbol="AAPL"):
+def train_and_save_model(symbol="AAPL", epochs=EPOCHS, report=None, save=True):
+    """
+    Trains the model on a symbol's history and saves it with its scaler and
+    metadata. Passing a report dict (see benchmark_training) records stage
+    timings and per-epoch throughput into it.
+
+    Returns:
+        bool: True once the model is trained (and saved, if save is set),
+              False when there was not enough data to train on.
+    """
     print(f"--- Starting model training for {symbol} ---")
-    os.makedirs(MODELS_DIR, exist_ok=True)
-    
     MODEL_PATH = os.path.join(MODELS_DIR, MODEL_NAME)
     SCALER_PATH = os.path.join(MODELS_DIR, SCALER_NAME)
     METADATA_PATH = os.path.join(MODELS_DIR, METADATA_NAME)
 
-    df_original = get_stock_data(symbol)
+    with timed(report, "download"):
+        df_original = get_stock_data(symbol)
     if df_original is None or df_original.empty:
         print(f"ERROR: No data found for '{symbol}'. Cannot train model.")
-        return
+        return False
 
-    df_features = calculate_technical_indicators(df_original)
+    with timed(report, "calculate_technical_indicators"):
+        df_features = calculate_technical_indicators(df_original)
 
     if len(df_features) < (LOOKBACK + N_STEPS_AHEAD + 50):
         print(f"ERROR: Insufficient data for '{symbol}'. Cannot train model.")
-        return
+        return False
 
     features_list = df_features.columns.tolist()
     close_column_index = df_features.columns.get_loc('Close')
 
-    X, y, scaler = prepare_data(df_features, LOOKBACK, N_STEPS_AHEAD)
+    X, y, scaler = prepare_data(df_features, LOOKBACK, N_STEPS_AHEAD, report)
     
     if len(X) == 0:
         print("ERROR: Not enough data to create training sequences.")
-        return
+        return False
         
-    model = build_model((X.shape[1], X.shape[2]), N_STEPS_AHEAD)
+    with timed(report, "build_model"):
+        model = build_model((X.shape[1], X.shape[2]), N_STEPS_AHEAD)
     
     early_stopping = EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)
     reduce_lr = ReduceLROnPlateau(monitor='val_loss', factor=0.2, patience=5, min_lr=0.0001)
+    # Keras validates on the last VALIDATION_SPLIT of the samples and trains on the rest
+    throughput = EpochThroughput(train_samples=int(len(X) * (1 - VALIDATION_SPLIT)))
+    callbacks = [early_stopping, reduce_lr]
+    if report is not None:
+        # Benchmarks run a fixed number of epochs so runs stay comparable
+        callbacks = [reduce_lr, throughput]
 
     print(f"Training model with {len(X)} samples...")
-    model.fit(X, y,
-              epochs=100,
-              batch_size=32,
-              validation_split=0.1,
-              callbacks=[early_stopping, reduce_lr],
-              verbose=1)
+    with timed(report, "fit"):
+        model.fit(X, y,
+                  epochs=epochs,
+                  batch_size=BATCH_SIZE,
+                  validation_split=VALIDATION_SPLIT,
+                  callbacks=callbacks,
+                  verbose=1)
 
     print("--- Model training complete ---")
 
-    model.save(MODEL_PATH)
-    joblib.dump(scaler, SCALER_PATH)
-    
-    model_metadata = {
-        'lookback': LOOKBACK,
-        'n_steps_ahead': N_STEPS_AHEAD,
-        'features_list': features_list,
-        'close_column_index': int(close_column_index)
-    }
-    with open(METADATA_PATH, 'w') as f:
-        json.dump(model_metadata, f, indent=4)
+    if report is not None:
+        report["dataset"] = {
+            "rows": len(df_original),
+            "feature_rows": len(df_features),
+            "features": len(features_list),
+            "samples": len(X),
+            "train_samples": throughput.train_samples,
+            "X_bytes": int(X.nbytes),
+        }
+        report["epochs"] = throughput.epochs
+    if not save:
+        return True
+
+    with timed(report, "save"):
+        os.makedirs(MODELS_DIR, exist_ok=True)
+        model.save(MODEL_PATH)
+        joblib.dump(scaler, SCALER_PATH)
+        
+        model_metadata = {
+            'lookback': LOOKBACK,
+            'n_steps_ahead': N_STEPS_AHEAD,
+            'features_list': features_list,
+            'close_column_index': int(close_column_index)
+        }
+        with open(METADATA_PATH, 'w') as f:
+            json.dump(model_metadata, f, indent=4)
 
     print(f"Model saved to: {MODEL_PATH}")
     print(f"Scaler saved to: {SCALER_PATH}")
     print(f"Metadata saved to: {METADATA_PATH}")
+    return True
+
+def tf_settings():
+    """TensorFlow's threading and device configuration, as this process will run it."""
+    return {
+        "version": tf.__version__,
+        "intra_op_parallelism_threads": tf.config.threading.get_intra_op_parallelism_threads(),  # 0 = TF decides
+        "inter_op_parallelism_threads": tf.config.threading.get_inter_op_parallelism_threads(),
+        "gpus": [device.name for device in tf.config.list_physical_devices("GPU")],
+        "env": {name: os.environ.get(name) for name in
+                ("OMP_NUM_THREADS", "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS", "TF_ENABLE_ONEDNN_OPTS")},
+    }
+
+def benchmark_training(symbol="AAPL", epochs=BENCHMARK_EPOCHS, report_path=None, save=False):
+    """
+    Trains once with every stage timed and writes a JSON report: stage wall
+    times, per-epoch samples/sec, TF thread settings and peak memory. The
+    trained model is only saved when save is set, so benchmarks never
+    replace the production model. Returns the report, or None (and writes
+    nothing) when training could not run.
+    """
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "symbol": symbol,
+        "config": {"epochs": epochs, "batch_size": BATCH_SIZE, "lookback": LOOKBACK,
+                   "n_steps_ahead": N_STEPS_AHEAD, "validation_split": VALIDATION_SPLIT},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "tensorflow": tf_settings(),
+        "stages": {},
+    }
+    start = time.perf_counter()
+    if not train_and_save_model(symbol, epochs=epochs, report=report, save=save):
+        print("ERROR: Training did not run; no benchmark report written.")
+        return None
+    report["total_seconds"] = round(time.perf_counter() - start, 4)
+    report["peak_rss_mb"] = peak_rss_mb()
+    if report["tensorflow"]["gpus"]:
+        report["peak_gpu_memory_mb"] = round(tf.config.experimental.get_memory_info("GPU:0")["peak"] / 2**20, 1)
+
+    epochs_run = report.get("epochs", [])
+    # The first epoch includes graph tracing, so steady-state throughput skips it
+    steady = [e["samples_per_second"] for e in epochs_run[1:] if e["samples_per_second"]]
+    report["steady_samples_per_second"] = round(float(np.median(steady)), 1) if steady else None
+
+    report_path = report_path or f"train_benchmark_{symbol}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    print("--- Training benchmark ---")
+    for stage, seconds in report["stages"].items():
+        print(f"{stage:<32}{seconds:>10.3f} s")
+    print(f"{'steady samples/sec':<32}{report['steady_samples_per_second']}")
+    print(f"{'peak RSS (MB)':<32}{report['peak_rss_mb']}")
+    print(f"Report saved to: {report_path}")
+    return report
 
 if __name__ == "__main__":
-    train_and_save_model(symbol="AAPL")
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the LSTM price model.")
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("--benchmark", action="store_true", help="Time each stage and write a JSON report")
+    parser.add_argument("--epochs", type=int, default=None,
+                        help=f"Epochs to run (default: {EPOCHS}, or {BENCHMARK_EPOCHS} with --benchmark)")
+    parser.add_argument("--report", help="Benchmark report path")
+    parser.add_argument("--save", action="store_true", help="Also save the model trained by --benchmark")
+    parser.add_argument("--intra-op-threads", type=int, help="TensorFlow intra-op thread pool size")
+    parser.add_argument("--inter-op-threads", type=int, help="TensorFlow inter-op thread pool size")
+    parser.add_argument("--offline", action="store_true",
+                        help="Train on the recorded market data fixtures (see benchmarks/fixtures.py)")
+    args = parser.parse_args()
+
+    # Thread pools can only be sized before TensorFlow runs its first op
+    if args.intra_op_threads is not None:
+        tf.config.threading.set_intra_op_parallelism_threads(args.intra_op_threads)
+    if args.inter_op_threads is not None:
+        tf.config.threading.set_inter_op_parallelism_threads(args.inter_op_threads)
+    if args.offline:
+        from tools import offline_provider
+        offline_provider.install()
+
+    if args.benchmark:
+        ok = benchmark_training(args.symbol, epochs=args.epochs or BENCHMARK_EPOCHS, report_path=args.report, save=args.save) is not None
+    else:
+        ok = train_and_save_model(symbol=args.symbol, epochs=args.epochs or EPOCHS)
+    sys.exit(0 if ok else 1)
\ No newline at end of file